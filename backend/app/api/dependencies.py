@@ -0,0 +1,54 @@
+"""
+Shared FastAPI dependencies for request validation.
+"""
+
+from typing import Annotated, Optional
+
+from arq.connections import ArqRedis
+from fastapi import Depends, Header, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.core.task_queue import get_task_queue
+
+GROQ_KEY_PREFIX = "gsk_"
+
+
+def validate_groq_key(
+    x_groq_api_key: Annotated[str, Header(alias="X-Groq-Api-Key")],
+) -> str:
+    """
+    FastAPI dependency: validate the user's Groq API key header.
+
+    Usage:
+        @router.post("/query")
+        async def query(x_groq_api_key: GroqApiKey):
+            ...
+    """
+    if not x_groq_api_key.startswith(GROQ_KEY_PREFIX):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid Groq API key. Must start with '{GROQ_KEY_PREFIX}'.",
+        )
+    return x_groq_api_key
+
+
+def require_ready(request: Request) -> None:
+    """
+    FastAPI dependency: 503 until deferred startup has finished.
+
+    Before then the database may not be set up and get_task_queue() is
+    still None, which would push indexing onto in-process BackgroundTasks.
+    """
+    if not request.app.state.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Service is starting, retry shortly",
+            headers={"Retry-After": "5"},
+        )
+
+
+# ── Annotated aliases (resolved once, shared across route signatures) ──
+DbSession = Annotated[AsyncSession, Depends(get_db)]
+GroqApiKey = Annotated[str, Depends(validate_groq_key)]
+TaskQueue = Annotated[Optional[ArqRedis], Depends(get_task_queue)]
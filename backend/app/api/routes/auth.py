@@ -1,12 +1,16 @@
+from typing import Annotated, Optional
+
 from fastapi import APIRouter, Request, Depends, HTTPException, status
-from fastapi.responses import RedirectResponse, JSONResponse
+from fastapi.responses import RedirectResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 
-from app.services.google_auth import GoogleAuthService
-from app.core.database import get_db
-from app.core.security import create_token_pair, verify_token
+from app.api.dependencies import DbSession
+from app.services.google_auth import auth_service
+from app.core.blacklist import is_token_revoked, revoke_token
+from app.core.security import create_token_pair, decode_token, verify_token
+from app.core.token_cache import cache_token, evict_token, get_cached_user_id
+from app.core.user_cache import CachedUser, cache_user, get_cached_user, invalidate_user
 from app.core.exceptions import (
     GoogleAuthError, 
     InvalidTokenError,
@@ -16,9 +20,27 @@ from app.models.database import User
 from sqlalchemy import select
 
 router = APIRouter()
-auth_service = GoogleAuthService()
 
 bearer_scheme = HTTPBearer(auto_error=False)
+BearerCredentials = Annotated[Optional[HTTPAuthorizationCredentials], Depends(bearer_scheme)]
+
+# 401 details for get_current_user. Only the constants are shared: a new
+# HTTPException is built per raise, since concurrent requests raising one
+# instance would overwrite each other's __traceback__/__context__.
+_BEARER_HEADERS = {"WWW-Authenticate": "Bearer"}
+_MISSING_CREDENTIALS = "Missing or invalid authorization header"
+_INVALID_TOKEN = "Invalid or expired token"
+_REVOKED_TOKEN = "Token has been revoked"
+_INACTIVE_USER = "User not found or inactive"
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers=_BEARER_HEADERS,
+    )
+
 
 class TokenResponse(BaseModel):
     access_token: str
@@ -48,18 +70,19 @@ async def login(request: Request, redirect: bool = True):
     return {"authorization_url": auth_url, "state": state}
 
 
-@router.get("/callback")
+@router.get("/callback", response_model=TokenResponse)
 async def callback(
     request: Request,
     code: str,
     state: str,
-    db: AsyncSession = Depends(get_db)
+    db: DbSession,
 ):
     """
     Handle Google OAuth callback.
     Exchange code for tokens, create/update user, issue JWT.
     """
-    stored_state = request.session.get("oauth_state")
+    # Single-use: pop so the session cookie is empty again after login
+    stored_state = request.session.pop("oauth_state", None)
     if not stored_state or state != stored_state:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -72,10 +95,11 @@ async def callback(
         google_user_info = await auth_service.get_user_info(token_info)
         
         user = await auth_service.create_or_update_user(db, google_user_info, token_info)
+        invalidate_user(user.id)
         
         tokens = create_token_pair(user.id)
         
-        return JSONResponse(content={
+        return {
             **tokens,
             "user": {
                 "id": user.id,
@@ -83,7 +107,7 @@ async def callback(
                 "name": user.name,
                 "picture": user.picture
             }
-        })
+        }
     
     except GoogleAuthError as e:
         raise to_http_exception(e)
@@ -97,7 +121,7 @@ async def callback(
 @router.post("/refresh", response_model=TokenResponse)
 async def refresh_token(
     request: RefreshTokenRequest,
-    db: AsyncSession = Depends(get_db)
+    db: DbSession,
 ):
     """
     Refresh access token using refresh token.
@@ -110,8 +134,7 @@ async def refresh_token(
             detail="Invalid refresh token"
         )
     
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+    user = await db.get(User, user_id)
     
     if not user or not user.is_active:
         raise HTTPException(
@@ -133,61 +156,80 @@ async def refresh_token(
 
 
 @router.post("/logout")
-async def logout(request: Request):
+async def logout(
+    request: Request,
+    credentials: BearerCredentials,
+):
     """
-    Logout - clear session.
-    Note: JWTs can't be invalidated, so this just clears session.
-    For production, implement token blacklist with Redis.
+    Logout - clear session and revoke the bearer token.
+    The token is blacklisted until its natural expiry.
     """
     request.session.clear()
+    if credentials:
+        token = credentials.credentials
+        payload = decode_token(token, token_type="access")
+        evict_token(token)
+        if payload:
+            await revoke_token(token, payload["exp"])
+            invalidate_user(payload["sub"])
     return {"message": "Logged out successfully"}
 
 async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
-    db: AsyncSession = Depends(get_db)
-) -> User:
+    credentials: BearerCredentials,
+    db: DbSession,
+) -> CachedUser:
     """
     FastAPI dependency to get current authenticated user.
     Uses HTTPBearer for Swagger UI compatibility.
     
+    Returns a read-only CachedUser snapshot; the users row is only
+    queried on a user-cache miss.
+    
     Usage:
         @router.get("/profile")
-        async def get_profile(user: User = Depends(get_current_user)):
+        async def get_profile(user: CurrentUser):
             return user
     """
     if not credentials:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Missing or invalid authorization header",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _unauthorized(_MISSING_CREDENTIALS)
     
     token = credentials.credentials
     
-    user_id = verify_token(token, token_type="access")
+    user_id = get_cached_user_id(token)
     
     if not user_id:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        payload = decode_token(token, token_type="access")
+        
+        if not payload:
+            raise _unauthorized(_INVALID_TOKEN)
+        
+        if await is_token_revoked(token):
+            raise _unauthorized(_REVOKED_TOKEN)
+        
+        user_id = payload["sub"]
+        cache_token(token, user_id, payload["exp"])
     
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+    user = get_cached_user(user_id)
+    if user is None:
+        result = await db.execute(
+            select(*CachedUser.columns()).where(User.id == user_id)
+        )
+        row = result.one_or_none()
+        if row is not None:
+            user = CachedUser.from_orm(row)
+            cache_user(user)
     
     if not user or not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found or inactive",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _unauthorized(_INACTIVE_USER)
     
     return user
 
 
+CurrentUser = Annotated[CachedUser, Depends(get_current_user)]
+
+
 @router.get("/me")
-async def get_me(user: User = Depends(get_current_user)):
+async def get_me(user: CurrentUser):
     """
     Get current user profile.
     """
@@ -198,4 +240,4 @@ async def get_me(user: User = Depends(get_current_user)):
         "picture": user.picture,
         "created_at": user.created_at.isoformat(),
         "last_login": user.last_login.isoformat() if user.last_login else None
-    }
\ No newline at end of file
+    }
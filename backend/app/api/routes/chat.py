@@ -9,18 +9,18 @@ Provides five endpoints:
   DELETE /chat/session/{session}  → Clear a session's memory
 """
 
+import hashlib
 import logging
-import uuid
+import secrets
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, Header, HTTPException, status
+from cachetools import TTLCache
+from fastapi import APIRouter, HTTPException, status
 from fastapi.responses import StreamingResponse
-from pydantic import BaseModel, ConfigDict
-from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel, ConfigDict, Field
 
-from app.api.routes.auth import get_current_user
-from app.core.database import get_db
-from app.models.database import User
+from app.api.dependencies import DbSession, GroqApiKey
+from app.api.routes.auth import CurrentUser
 from app.rag.agent import build_tutor_agent, invoke_agent, stream_agent
 from app.rag.tools import get_citations
 from app.rag.memory import clear_session, get_session_messages, list_user_sessions
@@ -28,15 +28,46 @@ from app.rag.memory import clear_session, get_session_messages, list_user_sessio
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# ── Agent cache ───────────────────────────────────────────────────────
+# Compiled agents are reused across queries; only session_id and the
+# question differ per request. The Groq key is hashed into the key so
+# a rotated key builds a fresh agent and the raw key is never stored.
+_AGENT_CACHE: TTLCache = TTLCache(maxsize=2048, ttl=600)
+
+
+async def _get_agent(user_id: str, groq_api_key: str, course_id: Optional[str]):
+    """Return a cached tutor agent, building it on first use."""
+    key = (
+        user_id,
+        course_id,
+        hashlib.blake2b(groq_api_key.encode(), digest_size=16).digest(),
+    )
+    agent = _AGENT_CACHE.get(key)
+    if agent is None:
+        agent = await build_tutor_agent(
+            user_id=user_id,
+            groq_api_key=groq_api_key,
+            course_id=course_id,
+        )
+        _AGENT_CACHE[key] = agent
+    return agent
+
 
 # ─── Request / Response Models ────────────────────────────────────────
 
+MAX_QUESTION_LENGTH = 4000
+
+
 class QueryRequest(BaseModel):
-    """Request body for the chat query endpoint."""
+    """Request body for the chat query endpoint.
 
-    question: str
-    session_id: Optional[str] = None
-    course_id: Optional[str] = None
+    Bounds are enforced by pydantic-core before the handler runs, so
+    oversize or malformed payloads never reach the agent or the DB.
+    """
+
+    question: str = Field(..., min_length=1, max_length=MAX_QUESTION_LENGTH)
+    session_id: Optional[str] = Field(None, max_length=64, pattern=r"^[A-Za-z0-9_-]+$")
+    course_id: Optional[str] = Field(None, max_length=64)
 
 
 class CitationResponse(BaseModel):
@@ -83,9 +114,9 @@ class HistoryResponse(BaseModel):
 @router.post("/query", response_model=QueryResponse)
 async def chat_query(
     request: QueryRequest,
-    x_groq_api_key: str = Header(..., alias="X-Groq-Api-Key"),
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    x_groq_api_key: GroqApiKey,
+    user: CurrentUser,
+    db: DbSession,
 ):
     """
     Send a question and receive an intelligent answer.
@@ -106,12 +137,6 @@ async def chat_query(
       - `course_id`: Restrict retrieval to one course's materials.
     """
     # ── Validate inputs ──────────────────────────────────────────
-    if not x_groq_api_key or not x_groq_api_key.startswith("gsk_"):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid Groq API key. Must start with 'gsk_'.",
-        )
-
     if not request.question.strip():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -119,15 +144,11 @@ async def chat_query(
         )
 
     # ── Session management ────────────────────────────────────────
-    session_id = request.session_id or f"{user.id}_{uuid.uuid4().hex[:12]}"
+    session_id = request.session_id or f"{user.id}_{secrets.token_hex(6)}"
 
     try:
         # ── Build and invoke the tutor agent ──────────────────────
-        agent = build_tutor_agent(
-            user_id=user.id,
-            groq_api_key=x_groq_api_key,
-            course_id=request.course_id,
-        )
+        agent = await _get_agent(user.id, x_groq_api_key, request.course_id)
 
         result = await invoke_agent(
             agent=agent,
@@ -139,24 +160,25 @@ async def chat_query(
 
         # ── Get citations from tool cache (structured JSON) ──
         sources = get_citations(user.id)
+        # Built from our own tool cache (every key always present) — skip
+        # validation and index the dicts directly
         citations = [
-            CitationResponse(
+            CitationResponse.model_construct(
                 number=s["id"],
                 source_id=None,
                 file_name=s["file_name"],
-                source_type=s.get("source_type", "document"),
-                page_number=s.get("page_number"),
-                start_time=s.get("start_time"),
-                end_time=s.get("end_time"),
-                text_snippet=s.get("content", "")[:200],
+                source_type=s["source_type"],
+                page_number=s["page_number"],
+                start_time=s["start_time"],
+                end_time=s["end_time"],
+                text_snippet=s["text_snippet"],
             )
             for s in sources
         ]
 
         logger.info(
-            f"Chat query completed: user={user.id}, "
-            f"session={session_id}, "
-            f"citations={len(citations)}"
+            "Chat query completed: user=%s, session=%s, citations=%d",
+            user.id, session_id, len(citations),
         )
 
         return QueryResponse(
@@ -169,7 +191,7 @@ async def chat_query(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Chat query failed: {e}", exc_info=True)
+        logger.error("Chat query failed: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Query failed: {str(e)}",
@@ -179,8 +201,8 @@ async def chat_query(
 @router.post("/query/stream")
 async def chat_query_stream(
     request: QueryRequest,
-    x_groq_api_key: str = Header(..., alias="X-Groq-Api-Key"),
-    user: User = Depends(get_current_user),
+    x_groq_api_key: GroqApiKey,
+    user: CurrentUser,
 ):
     """
     Stream the tutor's response via Server-Sent Events (SSE).
@@ -193,23 +215,13 @@ async def chat_query_stream(
 
     Use this for a real-time, responsive chat experience.
     """
-    if not x_groq_api_key or not x_groq_api_key.startswith("gsk_"):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid Groq API key.",
-        )
+    session_id = request.session_id or f"{user.id}_{secrets.token_hex(6)}"
 
-    session_id = request.session_id or f"{user.id}_{uuid.uuid4().hex[:12]}"
-
-    agent = build_tutor_agent(
-        user_id=user.id,
-        groq_api_key=x_groq_api_key,
-        course_id=request.course_id,
-    )
+    agent = await _get_agent(user.id, x_groq_api_key, request.course_id)
 
     return StreamingResponse(
         stream_agent(agent, request.question, session_id),
-        media_type="text/event-stream",
+        media_type="text/event-stream; charset=utf-8",
         headers={
             "Cache-Control": "no-cache",
             "X-Accel-Buffering": "no",
@@ -223,7 +235,7 @@ async def chat_query_stream(
 # ─── Session & History Endpoints ──────────────────────────────────────
 
 @router.get("/sessions")
-async def list_sessions(user: User = Depends(get_current_user)):
+async def list_sessions(user: CurrentUser):
     """List all chat sessions for the current user."""
     sessions = list_user_sessions(user.id)
     return {"sessions": sessions, "count": len(sessions)}
@@ -232,7 +244,7 @@ async def list_sessions(user: User = Depends(get_current_user)):
 @router.get("/history/{session_id}", response_model=HistoryResponse)
 async def chat_history(
     session_id: str,
-    user: User = Depends(get_current_user),
+    user: CurrentUser,
 ):
     """
     Get conversation history for a session.
@@ -250,7 +262,7 @@ async def chat_history(
 
     return HistoryResponse(
         session_id=session_id,
-        messages=[MessageResponse(**m) for m in messages],
+        messages=[MessageResponse.model_construct(**m) for m in messages],
         message_count=len(messages),
     )
 
@@ -258,7 +270,7 @@ async def chat_history(
 @router.delete("/session/{session_id}")
 async def delete_session(
     session_id: str,
-    user: User = Depends(get_current_user),
+    user: CurrentUser,
 ):
     """
     Clear a session's conversation history.
@@ -283,4 +295,3 @@ async def delete_session(
         "message": f"Session '{session_id}' cleared.",
         "session_id": session_id,
     }
-
@@ -1,21 +1,54 @@
+import asyncio
 import uuid
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Annotated, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
-from pydantic import BaseModel, ConfigDict
+from google.oauth2.credentials import Credentials
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 
-from app.api.routes.auth import get_current_user
-from app.core.database import get_db
-from app.core.exceptions import ClassroomAPIError, DriveAPIError, to_http_exception
-from app.services.google_auth import GoogleAuthService
-from app.services.classroom_service import ClassroomService
-from app.services.file_service import FileService
-from app.models.database import User, Course, File
+from app.api.dependencies import DbSession
+from app.api.routes.auth import CurrentUser
+from app.core.exceptions import (
+    ClassroomAPIError,
+    DriveAPIError,
+    GoogleAuthError,
+    ResourceNotFoundError,
+    to_http_exception,
+)
+from app.services.google_auth import auth_service
+from app.services.classroom_service import ClassroomService, get_classroom_service
+from app.services.file_service import get_file_service
+from app.models.database import Course, File
 
 router = APIRouter()
-auth_service = GoogleAuthService()
+
+# Max concurrent Drive downloads per course sync
+DOWNLOAD_CONCURRENCY = 8
+
+# Above this many new files, COPY through a staging table instead of a
+# multi-row INSERT (which also tops out at asyncpg's 32767 bind params)
+COPY_INSERT_THRESHOLD = 200
+
+# ── Google service dependencies ──────────────────────────────────
+async def get_google_credentials(user: CurrentUser, db: DbSession) -> Credentials:
+    """FastAPI dependency: the user's Google credentials, refreshed if expired."""
+    try:
+        return await auth_service.get_valid_credentials(db, user.id)
+    except (GoogleAuthError, ResourceNotFoundError) as e:
+        raise to_http_exception(e)
+
+
+def get_user_classroom_service(
+    creds: Annotated[Credentials, Depends(get_google_credentials)],
+) -> ClassroomService:
+    """FastAPI dependency: the cached ClassroomService for the user's token."""
+    return get_classroom_service(creds)
+
+
+UserClassroomService = Annotated[ClassroomService, Depends(get_user_classroom_service)]
+
 
 class CourseResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -40,6 +73,14 @@ class FileResponse(BaseModel):
     processing_status: str
     file_size: Optional[int] = None
 
+# Only the columns each response model needs — plain rows, no ORM hydration
+_COURSE_COLUMNS = tuple(getattr(Course, f) for f in CourseResponse.model_fields)
+_FILE_COLUMNS = tuple(getattr(File, f) for f in FileResponse.model_fields)
+
+# One compiled validator per list shape, run once over all rows
+_course_list_adapter = TypeAdapter(List[CourseResponse])
+_file_list_adapter = TypeAdapter(List[FileResponse])
+
 class SyncStatusResponse(BaseModel):
     course_id: str
     status: str
@@ -49,74 +90,76 @@ class SyncStatusResponse(BaseModel):
 
 @router.get("/courses", response_model=List[CourseResponse])
 async def list_courses(
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    user: CurrentUser,
+    db: DbSession,
 ):
     """
     List all synced courses for the user.
     """
     result = await db.execute(
-        select(Course).where(Course.user_id == user.id, Course.is_active == True)
+        select(*_COURSE_COLUMNS).where(Course.user_id == user.id, Course.is_active == True)
     )
-    courses = result.scalars().all()
     
-    return [CourseResponse.model_validate(course) for course in courses]
+    return _course_list_adapter.validate_python(result.mappings().all())
 
 
 @router.get("/courses/sync")
 async def sync_courses_from_classroom(
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    user: CurrentUser,
+    db: DbSession,
+    classroom_service: UserClassroomService,
 ):
     """
     Sync courses from Google Classroom.
     Creates/updates Course records in database.
     """
     try:
-        creds = await auth_service.get_valid_credentials(db, user.id)
-        
-        classroom_service = ClassroomService(creds)
-        
         classroom_courses = await classroom_service.list_courses()
         
-        synced_courses = []
+        # One row per classroom course (dedupe: ON CONFLICT can't touch a row twice)
+        rows = {
+            c['id']: {
+                "id": str(uuid.uuid4()),
+                "user_id": user.id,
+                "classroom_id": c['id'],
+                "name": c.get('name', 'Untitled Course'),
+                "section": c.get('section'),
+                "description": c.get('descriptionHeading'),
+                "room": c.get('room'),
+                "owner_id": c.get('ownerId'),
+            }
+            for c in classroom_courses
+        }
         
-        for classroom_course in classroom_courses:
-            result = await db.execute(
-                select(Course).where(
-                    Course.user_id == user.id,
-                    Course.classroom_id == classroom_course['id']
-                )
-            )
-            course = result.scalar_one_or_none()
-            
-            if course:
-                course.name = classroom_course.get('name', 'Untitled Course')
-                course.section = classroom_course.get('section')
-                course.description = classroom_course.get('descriptionHeading')
-                course.room = classroom_course.get('room')
-                course.owner_id = classroom_course.get('ownerId')
-                course.updated_at = datetime.now(timezone.utc)
-            else:
-                course = Course(
-                    id=str(uuid.uuid4()),
-                    user_id=user.id,
-                    classroom_id=classroom_course['id'],
-                    name=classroom_course.get('name', 'Untitled Course'),
-                    section=classroom_course.get('section'),
-                    description=classroom_course.get('descriptionHeading'),
-                    room=classroom_course.get('room'),
-                    owner_id=classroom_course.get('ownerId')
-                )
-                db.add(course)
+        synced_courses = []
+        if rows:
+            # Single INSERT ... ON CONFLICT DO UPDATE instead of SELECT + write
+            # per course; RETURNING hands back every response column in the
+            # same round trip, so there is no re-SELECT.
+            stmt = pg_insert(Course).values(list(rows.values()))
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Course.user_id, Course.classroom_id],
+                set_={
+                    "name": stmt.excluded.name,
+                    "section": stmt.excluded.section,
+                    "description": stmt.excluded.description,
+                    "room": stmt.excluded.room,
+                    "owner_id": stmt.excluded.owner_id,
+                    "updated_at": datetime.now(timezone.utc),
+                },
+            ).returning(*_COURSE_COLUMNS)
+            result = await db.execute(stmt)
             
-            synced_courses.append(course)
-        
-        await db.flush()
+            # RETURNING order isn't guaranteed — restore Classroom's order
+            by_classroom_id = {
+                m["classroom_id"]: CourseResponse.model_validate(m)
+                for m in result.mappings()
+            }
+            synced_courses = [by_classroom_id[cid] for cid in rows if cid in by_classroom_id]
         
         return {
             "message": f"Synced {len(synced_courses)} courses",
-            "courses": [CourseResponse.model_validate(c) for c in synced_courses]
+            "courses": synced_courses
         }
     
     except ClassroomAPIError as e:
@@ -132,8 +175,8 @@ async def sync_courses_from_classroom(
 async def sync_course_files(
     course_id: str,
     background_tasks: BackgroundTasks,
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    user: CurrentUser,
+    db: DbSession,
 ):
     """
     Start background sync of course files.
@@ -167,26 +210,59 @@ async def sync_course_files(
 @router.get("/courses/{course_id}/files", response_model=List[FileResponse])
 async def list_course_files(
     course_id: str,
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    user: CurrentUser,
+    db: DbSession,
 ):
     """
     List all files for a course.
     """
     result = await db.execute(
-        select(Course).where(Course.id == course_id, Course.user_id == user.id)
+        select(*_FILE_COLUMNS)
+        .join(Course, Course.id == File.course_id)
+        .where(
+            Course.id == course_id,
+            Course.user_id == user.id,
+            File.is_deleted == False,
+        )
     )
-    course = result.scalar_one_or_none()
+    files = _file_list_adapter.validate_python(result.mappings().all())
     
-    if not course:
-        raise HTTPException(status_code=404, detail="Course not found")
+    # Only an empty result needs the ownership check to pick 404 vs []
+    if not files:
+        owned = await db.scalar(
+            select(Course.id).where(Course.id == course_id, Course.user_id == user.id)
+        )
+        if owned is None:
+            raise HTTPException(status_code=404, detail="Course not found")
     
-    result = await db.execute(
-        select(File).where(File.course_id == course_id, File.is_deleted == False)
-    )
-    files = result.scalars().all()
+    return files
+
+async def _copy_insert_files(db, rows: List[dict]) -> None:
+    """
+    Bulk-load File rows with COPY, then merge them with ON CONFLICT DO NOTHING.
+
+    Runs on the session's own connection, so it shares the sync transaction;
+    the staging table is dropped at commit.
+    """
+    columns = list(rows[0])
+    column_list = ", ".join(columns)
     
-    return [FileResponse.model_validate(f) for f in files]
+    conn = await db.connection()
+    raw = await conn.get_raw_connection()
+    pg = raw.driver_connection  # asyncpg.Connection
+    
+    await pg.execute(
+        "CREATE TEMP TABLE files_staging (LIKE files INCLUDING DEFAULTS) ON COMMIT DROP"
+    )
+    await pg.copy_records_to_table(
+        "files_staging",
+        records=[tuple(row[c] for c in columns) for row in rows],
+        columns=columns,
+    )
+    await pg.execute(
+        f"INSERT INTO files ({column_list}) SELECT {column_list} FROM files_staging "
+        "ON CONFLICT (user_id, drive_id) DO NOTHING"
+    )
 
 async def _sync_course_files_background(user_id: str, course_id: str, classroom_id: str):
     """
@@ -200,78 +276,114 @@ async def _sync_course_files_background(user_id: str, course_id: str, classroom_
         try:
             creds = await auth_service.get_valid_credentials(db, user_id)
             
-            classroom_service = ClassroomService(creds)
-            file_service = FileService(creds)
+            classroom_service = get_classroom_service(creds)
+            file_service = get_file_service(creds)
             
             classroom_files = await classroom_service.get_all_course_files(classroom_id)
             logger.info(f"[sync] Found {len(classroom_files)} total files for classroom {classroom_id}")
             
-            downloaded_count = 0
+            drive_files = []
             skipped_count = 0
-            
             for cf in classroom_files:
                 if cf['drive_id'].startswith(('youtube_', 'link_')):
                     logger.debug(f"[sync] Skipping non-Drive file: {cf['drive_name']}")
                     skipped_count += 1
                     continue
-                
+                drive_files.append(cf)
+            
+            # One query for every file we already have (instead of one per file)
+            existing_ids = set()
+            if drive_files:
                 result = await db.execute(
-                    select(File).where(
+                    select(File.drive_id).where(
                         File.user_id == user_id,
-                        File.drive_id == cf['drive_id']
+                        File.drive_id.in_([cf['drive_id'] for cf in drive_files])
                     )
                 )
-                existing_file = result.scalar_one_or_none()
-                
-                if existing_file:
-                    logger.debug(f"[sync] Already exists: {cf['drive_name']}")
-                    skipped_count += 1
-                    continue  
-                
-                try:
+                existing_ids = set(result.scalars().all())
+            
+            to_download = [cf for cf in drive_files if cf['drive_id'] not in existing_ids]
+            skipped_count += len(drive_files) - len(to_download)
+            
+            # Downloads are I/O bound — overlap them, bounded by a semaphore.
+            # DB writes stay on this one session after gather() completes.
+            semaphore = asyncio.Semaphore(DOWNLOAD_CONCURRENCY)
+            
+            async def _download(cf: dict):
+                async with semaphore:
                     logger.info(f"[sync] Downloading: {cf['drive_name']} (mime={cf.get('mime_type')})")
-                    local_path, file_size, file_hash = await file_service.download_file(
+                    return await file_service.download_file(
                         cf['drive_id'],
                         cf['drive_name'],
                         user_id
                     )
-                    
-                    detected_type = file_service.detect_file_type(cf['mime_type'], cf['drive_name'])
-                    
-                    new_file = File(
-                        id=str(uuid.uuid4()),
-                        user_id=user_id,
-                        course_id=course_id,
-                        drive_id=cf['drive_id'],
-                        drive_name=cf['drive_name'],
-                        mime_type=cf['mime_type'],
-                        web_view_link=cf['web_view_link'],
-                        local_path=local_path,
-                        file_size=file_size,
-                        file_hash=file_hash,
-                        detected_type=detected_type,
-                        processing_status="pending"
-                    )
-                    db.add(new_file)
-                    downloaded_count += 1
-                    logger.info(f"[sync] Downloaded: {cf['drive_name']} ({file_size} bytes)")
-                
-                except DriveAPIError as e:
-                    logger.warning(f"[sync] Download FAILED for {cf['drive_name']}: {e}")
+            
+            results = await asyncio.gather(
+                *(_download(cf) for cf in to_download), return_exceptions=True
+            )
+            
+            new_rows = []
+            for cf, outcome in zip(to_download, results):
+                if isinstance(outcome, DriveAPIError):
+                    logger.warning(f"[sync] Download FAILED for {cf['drive_name']}: {outcome}")
                     continue
-                except Exception as e:
-                    logger.error(f"[sync] Unexpected error for {cf['drive_name']}: {e}")
+                if isinstance(outcome, BaseException):
+                    logger.error(f"[sync] Unexpected error for {cf['drive_name']}: {outcome}")
                     continue
+                
+                local_path, file_size, file_hash = outcome
+                detected_type = file_service.detect_file_type(cf['mime_type'], cf['drive_name'])
+                
+                new_rows.append({
+                    "id": str(uuid.uuid4()),
+                    "user_id": user_id,
+                    "course_id": course_id,
+                    "drive_id": cf['drive_id'],
+                    "drive_name": cf['drive_name'],
+                    "mime_type": cf['mime_type'],
+                    "web_view_link": cf['web_view_link'],
+                    "local_path": local_path,
+                    "file_size": file_size,
+                    "file_hash": file_hash,
+                    "detected_type": detected_type,
+                    "processing_status": "pending",
+                    # Python-side column defaults don't apply to COPY
+                    "chunk_count": 0,
+                    "contains_visual": False,
+                    "is_deleted": False,
+                })
+                logger.info(f"[sync] Downloaded: {cf['drive_name']} ({file_size} bytes)")
+            
+            # One bulk write (COPY for large courses); a concurrent sync may have
+            # inserted some already
+            if len(new_rows) >= COPY_INSERT_THRESHOLD:
+                await _copy_insert_files(db, new_rows)
+            elif new_rows:
+                await db.execute(
+                    pg_insert(File)
+                    .values(new_rows)
+                    .on_conflict_do_nothing(index_elements=[File.user_id, File.drive_id])
+                )
+            downloaded_count = len(new_rows)
             
+            # Counts come from the files table itself (same statement), so
+            # skipped YouTube/link entries aren't counted and concurrent
+            # indexing can't race a Python-side tally.
+            course_files = select(func.count()).where(
+                File.course_id == course_id, File.is_deleted == False
+            )
             await db.execute(
                 update(Course)
                 .where(Course.id == course_id)
                 .values(
                     sync_status="completed",
                     sync_error=None,
-                    last_synced=datetime.now(timezone.utc),
-                    total_files=len(classroom_files),
-                    updated_at=datetime.now(timezone.utc)
+                    last_synced=func.now(),
+                    total_files=course_files.scalar_subquery(),
+                    processed_files=course_files.where(
+                        File.processing_status == "completed"
+                    ).scalar_subquery(),
+                    updated_at=func.now()
                 )
             )
             
@@ -292,4 +404,4 @@ async def _sync_course_files_background(user_id: str, course_id: str, classroom_
                     updated_at=datetime.now(timezone.utc)
                 )
             )
-            await db.commit()
\ No newline at end of file
+            await db.commit()
@@ -1,92 +1,140 @@
+import asyncio
 import logging
 import os
+import tempfile
+from pathlib import Path
 from typing import Optional
 
-from fastapi import APIRouter, Depends, File, Form, Header, HTTPException, UploadFile, status
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile, status
+from fastapi.responses import ORJSONResponse
 
-from app.api.routes.auth import get_current_user
+from app.api.dependencies import GroqApiKey
+from app.api.routes.auth import CurrentUser
+from app.core.process_pool import run_in_process
 
-from app.processing.audio_processor import process_audio_bytes, SUPPORTED_AUDIO_FORMATS
+from app.processing.audio_processor import process_audio, SUPPORTED_AUDIO_FORMATS
 from app.processing.image_processor import process_image, SUPPORTED_IMAGE_FORMATS
-from app.processing.pdf_processor import process_pdf
-from app.processing.semantic_merger import SemanticMerger
-from app.processing.video_processor import process_video_bytes, SUPPORTED_VIDEO_FORMATS
+from app.processing.pdf_processor import process_pdf_file
+from app.processing.semantic_merger import merge_and_chunk_payload
+from app.processing.video_processor import process_video, SUPPORTED_VIDEO_FORMATS
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 ALL_SUPPORTED = {'.pdf'} | SUPPORTED_IMAGE_FORMATS | SUPPORTED_AUDIO_FORMATS | SUPPORTED_VIDEO_FORMATS
 MAX_UPLOAD = 100 * 1024 * 1024  
+UPLOAD_CHUNK = 1024 * 1024
+
+_TOO_LARGE = f"File too large. Max: {MAX_UPLOAD // 1024 // 1024}MB"
+
+_EXT_TO_TYPE = {
+    '.pdf': 'pdf',
+    **{ext: 'image' for ext in SUPPORTED_IMAGE_FORMATS},
+    **{ext: 'audio' for ext in SUPPORTED_AUDIO_FORMATS},
+    **{ext: 'video' for ext in SUPPORTED_VIDEO_FORMATS},
+}
+
+_UNSUPPORTED_DETAIL = f"Unsupported format. Supported: {sorted(ALL_SUPPORTED)}"
+
+# Static payload — serialized once at import, served as-is
+_SUPPORTED_FORMATS_RESPONSE = ORJSONResponse({
+    "pdf": [".pdf"],
+    "image": sorted(SUPPORTED_IMAGE_FORMATS),
+    "audio": sorted(SUPPORTED_AUDIO_FORMATS),
+    "video": sorted(SUPPORTED_VIDEO_FORMATS),
+})
+
 
 def _file_type(filename: str) -> str:
-    ext = os.path.splitext(filename)[1].lower()
-    if ext == '.pdf': return 'pdf'
-    if ext in SUPPORTED_IMAGE_FORMATS: return 'image'
-    if ext in SUPPORTED_AUDIO_FORMATS: return 'audio'
-    if ext in SUPPORTED_VIDEO_FORMATS: return 'video'
-    return 'unknown'
-
-@router.post("/process")
+    dot = filename.rfind('.')
+    if dot == -1:
+        return 'unknown'
+    return _EXT_TO_TYPE.get(filename[dot:].lower(), 'unknown')
+
+
+async def _spool_upload(file: UploadFile) -> str:
+    """
+    Copy an upload to a named temp file chunk by chunk, enforcing MAX_UPLOAD.
+
+    Peak memory stays at one chunk, and the processors get a path they can
+    open directly instead of a 100 MB bytes object. Caller deletes the file.
+    """
+    suffix = os.path.splitext(file.filename or "")[1].lower()
+    tmp = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
+    total = 0
+    try:
+        with tmp:
+            while chunk := await file.read(UPLOAD_CHUNK):
+                total += len(chunk)
+                if total > MAX_UPLOAD:
+                    raise HTTPException(status_code=413, detail=_TOO_LARGE)
+                await asyncio.to_thread(tmp.write, chunk)
+        if total == 0:
+            raise HTTPException(status_code=400, detail="Empty file.")
+    except BaseException:
+        os.unlink(tmp.name)
+        raise
+    return tmp.name
+
+
+@router.post("/process", response_class=ORJSONResponse)
 async def process_file(
+    x_groq_api_key: GroqApiKey,
+    _user: CurrentUser,
     file: UploadFile = File(...),
     course_id: Optional[str] = Form(None),
     course_name: Optional[str] = Form(None),
-    x_groq_api_key: str = Header(..., alias="X-Groq-Api-Key"),
-    _user = Depends(get_current_user),
 ):
     """
     Upload any file (PDF/image/audio/video) → auto-detect → process → chunked documents.
     Requires Groq API key in X-Groq-Api-Key header.
     """
-    if not x_groq_api_key or not x_groq_api_key.startswith("gsk_"):
-        raise HTTPException(status_code=400, detail="Invalid Groq API key. Must start with 'gsk_'.")
-
     ftype = _file_type(file.filename or "unknown")
     if ftype == 'unknown':
-        raise HTTPException(status_code=400, detail=f"Unsupported format. Supported: {sorted(ALL_SUPPORTED)}")
+        raise HTTPException(status_code=400, detail=_UNSUPPORTED_DETAIL)
 
-    content = await file.read()
-    if len(content) > MAX_UPLOAD:
-        raise HTTPException(status_code=413, detail=f"File too large. Max: {MAX_UPLOAD // 1024 // 1024}MB")
-    if not content:
-        raise HTTPException(status_code=400, detail="Empty file.")
+    # Reject early when the multipart parser already knows the size
+    if file.size is not None and file.size > MAX_UPLOAD:
+        raise HTTPException(status_code=413, detail=_TOO_LARGE)
 
     fname = file.filename or "uploaded_file"
+    path = await _spool_upload(file)
 
     try:
         if ftype == 'pdf':
-            docs = await process_pdf(content, x_groq_api_key, fname, course_id)
+            docs = await process_pdf_file(path, x_groq_api_key, fname, course_id, raise_errors=True)
         elif ftype == 'image':
-            docs = [await process_image(content, x_groq_api_key, fname, course_id)]
+            image_bytes = await asyncio.to_thread(Path(path).read_bytes)
+            docs = [await process_image(image_bytes, x_groq_api_key, fname, course_id)]
         elif ftype == 'audio':
-            docs = await process_audio_bytes(content, x_groq_api_key, fname, course_id)
+            docs = await process_audio(path, x_groq_api_key, fname, course_id)
         elif ftype == 'video':
-            docs = await process_video_bytes(content, x_groq_api_key, fname, course_id)
+            docs = await process_video(path, x_groq_api_key, fname, course_id)
         else:
             raise HTTPException(status_code=400, detail=f"Cannot process: {ftype}")
 
-        chunked = SemanticMerger().merge_and_chunk(docs, course_id, course_name)
+        # Splitting is pure Python — keep it off the event loop's thread
+        chunked = await run_in_process(merge_and_chunk_payload, docs, course_id, course_name)
 
-        return {
+        # Returned as a Response so FastAPI skips its jsonable_encoder pass
+        # over what can be megabytes of chunk text.
+        return ORJSONResponse({
             "status": "success",
             "file_name": fname,
             "file_type": ftype,
             "raw_documents": len(docs),
             "chunked_documents": len(chunked),
-            "documents": [{"text": d.page_content, "metadata": d.metadata} for d in chunked],
-        }
+            "documents": chunked,
+        })
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Processing failed for '{fname}': {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Processing failed: {e}")
+    finally:
+        os.unlink(path)
 
 
 @router.get("/supported-formats")
 async def get_supported_formats():
-    return {
-        "pdf": [".pdf"],
-        "image": sorted(SUPPORTED_IMAGE_FORMATS),
-        "audio": sorted(SUPPORTED_AUDIO_FORMATS),
-        "video": sorted(SUPPORTED_VIDEO_FORMATS),
-    }
\ No newline at end of file
+    return _SUPPORTED_FORMATS_RESPONSE
@@ -1,15 +1,18 @@
 import logging
-from typing import List, Optional
+import uuid
+from typing import Annotated, List, Optional
 
-from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, status
+from arq.connections import ArqRedis
+from fastapi import APIRouter, BackgroundTasks, Header, HTTPException, status
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
-
-from app.api.routes.auth import get_current_user
-from app.core.database import get_db
-from app.models.database import Course, File, User
-from app.rag.vector_store import EduverseVectorStore
+from sqlalchemy import select, update
+from sqlalchemy.exc import ProgrammingError
+
+from app.api.dependencies import DbSession, TaskQueue
+from app.api.routes.auth import CurrentUser
+from app.core.security import encrypt_token
+from app.models.database import Course, File
+from app.rag.vector_store import delete_by_file_stmt, invalidate_collection_caches
 from app.workflows.indexing_workflow import run_indexing
 
 logger = logging.getLogger(__name__)
@@ -27,6 +30,7 @@ class IndexingStatusResponse(BaseModel):
     chunk_count: int = 0
     contains_visual: bool = False
     processing_error: Optional[str] = None
+    processing_job_id: Optional[str] = None
 
 
 class IndexingStartResponse(BaseModel):
@@ -42,65 +46,105 @@ class BatchIndexingResponse(BaseModel):
     file_ids: List[str]
 
 
+async def _enqueue_indexing(
+    queue: Optional[ArqRedis],
+    background_tasks: BackgroundTasks,
+    job_id: Optional[str],
+    groq_api_key: str,
+    **job,
+) -> None:
+    """
+    Hand one file to the indexing worker under a pre-assigned arq job id.
+
+    Without a task queue (no REDIS_URL) the workflow runs in-process
+    after the response, and there is no job id. Queued jobs carry the
+    Groq key Fernet-encrypted, so it is never stored in Redis in plaintext.
+    """
+    if queue is None:
+        background_tasks.add_task(run_indexing, groq_api_key=groq_api_key, **job)
+        return
+    await queue.enqueue_job(
+        "run_indexing",
+        _job_id=job_id,
+        encrypted_groq_key=encrypt_token(groq_api_key),
+        **job,
+    )
+
+
 # ── POST /indexing/file/{file_id} ────────────────────────────────
 @router.post("/file/{file_id}", response_model=IndexingStartResponse)
 async def start_indexing(
     file_id: str,
     background_tasks: BackgroundTasks,
-    x_groq_api_key: str = Header(..., alias="X-Groq-Api-Key"),
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    x_groq_api_key: Annotated[str, Header(alias="X-Groq-Api-Key")],
+    user: CurrentUser,
+    db: DbSession,
+    queue: TaskQueue,
 ):
     """
     Start indexing a single file.
 
-    Launches the LangGraph workflow in the background:
+    Enqueues the LangGraph workflow on the indexing worker:
     download → process → chunk → embed → update_db
 
     Requires the user's Groq API key in the X-Groq-Api-Key header.
     """
-    # Verify file exists and belongs to user
+    # Conditional status flip in one statement: ownership, the "already
+    # indexed" guard and the course-name lookup all happen in Postgres.
+    # The job id is assigned up front so it is written in the same UPDATE.
+    job_id = uuid.uuid4().hex if queue is not None else None
     result = await db.execute(
-        select(File).where(File.id == file_id, File.user_id == user.id)
+        update(File)
+        .where(
+            File.id == file_id,
+            File.user_id == user.id,
+            File.processing_status != "completed",
+        )
+        .values(
+            processing_status="processing",
+            processing_error=None,
+            processing_job_id=job_id,
+        )
+        .returning(
+            File.drive_name,
+            File.course_id,
+            select(Course.name).where(Course.id == File.course_id).scalar_subquery(),
+        )
+        .execution_options(synchronize_session=False)
     )
-    file_record = result.scalar_one_or_none()
-    if not file_record:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"File {file_id} not found",
+    row = result.one_or_none()
+    if row is None:
+        # Cold path: tell "no such file" apart from "already indexed"
+        exists = await db.scalar(
+            select(File.id).where(File.id == file_id, File.user_id == user.id)
         )
-
-    if file_record.processing_status == "completed":
+        if exists is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"File {file_id} not found",
+            )
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="File already indexed. Delete first to re-index.",
         )
+    drive_name, file_course_id, course_name = row
 
-    # Mark as processing
-    file_record.processing_status = "processing"
-    file_record.processing_error = None
-    await db.flush()
-
-    # Get course name for metadata
-    course_name = None
-    if file_record.course_id:
-        course_result = await db.execute(
-            select(Course.name).where(Course.id == file_record.course_id)
-        )
-        course_name = course_result.scalar_one_or_none()
+    # Commit the status change BEFORE the worker can pick the job up
+    await db.commit()
 
-    # Launch workflow in background
-    background_tasks.add_task(
-        run_indexing,
+    await _enqueue_indexing(
+        queue,
+        background_tasks,
+        job_id,
+        x_groq_api_key,
         file_id=file_id,
         user_id=user.id,
-        groq_api_key=x_groq_api_key,
-        course_id=file_record.course_id,
+        course_id=file_course_id,
         course_name=course_name,
     )
 
     return IndexingStartResponse(
-        message=f"Indexing started for '{file_record.drive_name}'",
+        message=f"Indexing started for '{drive_name}'",
         file_id=file_id,
         status="processing",
     )
@@ -111,61 +155,76 @@ async def start_indexing(
 async def start_course_indexing(
     course_id: str,
     background_tasks: BackgroundTasks,
-    x_groq_api_key: str = Header(..., alias="X-Groq-Api-Key"),
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    x_groq_api_key: Annotated[str, Header(alias="X-Groq-Api-Key")],
+    user: CurrentUser,
+    db: DbSession,
+    queue: TaskQueue,
 ):
     """
     Index all pending (unprocessed) files in a course.
 
-    Queues each file as a separate background workflow.
+    Enqueues a single index_course job; the worker queues one
+    run_indexing job per file.
     """
-    # Verify course belongs to user
-    course_result = await db.execute(
-        select(Course).where(Course.id == course_id, Course.user_id == user.id)
-    )
-    course = course_result.scalar_one_or_none()
-    if not course:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Course {course_id} not found",
-        )
-
-    # Get all pending files for this course
+    # Flip every pending/failed file to processing in one statement.
+    # Joining courses (UPDATE ... FROM) enforces ownership and returns the
+    # course name, so the hot path is a single round trip. The fan-out
+    # job id is written here too; the worker replaces it with each
+    # file's own job id.
+    fanout_job_id = uuid.uuid4().hex if queue is not None else None
     files_result = await db.execute(
-        select(File).where(
-            File.course_id == course_id,
-            File.user_id == user.id,
+        update(File)
+        .where(
+            File.course_id == Course.id,
+            Course.id == course_id,
+            Course.user_id == user.id,
             File.processing_status.in_(["pending", "failed"]),
         )
+        .values(
+            processing_status="processing",
+            processing_error=None,
+            processing_job_id=fanout_job_id,
+        )
+        .returning(File.id, Course.name)
+        .execution_options(synchronize_session=False)
     )
-    pending_files = files_result.scalars().all()
+    rows = files_result.all()
 
-    if not pending_files:
+    if not rows:
+        # Cold path: tell "no such course" apart from "nothing to index"
+        owned = await db.scalar(
+            select(Course.id).where(Course.id == course_id, Course.user_id == user.id)
+        )
+        if owned is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Course {course_id} not found",
+            )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No pending files found for this course",
         )
 
-    # Mark all files as processing FIRST, then commit, then schedule tasks
-    file_ids = []
-    for file_record in pending_files:
-        file_record.processing_status = "processing"
-        file_record.processing_error = None
-        file_ids.append(file_record.id)
+    file_ids = [file_id for file_id, _ in rows]
+    course_name = rows[0][1]
 
-    # Commit all status changes in one transaction BEFORE scheduling background tasks
+    # Commit the status change BEFORE the worker can pick the job up
     await db.commit()
 
-    # Now schedule the background tasks (db is already committed)
-    for file_record in pending_files:
-        background_tasks.add_task(
-            run_indexing,
-            file_id=file_record.id,
-            user_id=user.id,
-            groq_api_key=x_groq_api_key,
-            course_id=course_id,
-            course_name=course.name,
+    job = dict(user_id=user.id, course_id=course_id, course_name=course_name)
+    if queue is None:
+        for file_id in file_ids:
+            background_tasks.add_task(
+                run_indexing, file_id=file_id, groq_api_key=x_groq_api_key, **job
+            )
+    else:
+        # One broker call; the worker fans out to per-file jobs
+        await queue.enqueue_job(
+            "index_course",
+            file_ids=file_ids,
+            _job_id=fanout_job_id,
+            encrypted_groq_key=encrypt_token(x_groq_api_key),
+            **job,
         )
 
     return BatchIndexingResponse(
@@ -180,8 +239,8 @@ async def start_course_indexing(
 @router.get("/status/{file_id}", response_model=IndexingStatusResponse)
 async def get_indexing_status(
     file_id: str,
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    user: CurrentUser,
+    db: DbSession,
 ):
     """
     Get the current processing status of a file.
@@ -204,6 +263,7 @@ async def get_indexing_status(
         chunk_count=file_record.chunk_count,
         contains_visual=file_record.contains_visual,
         processing_error=file_record.processing_error,
+        processing_job_id=file_record.processing_job_id,
     )
 
 
@@ -211,42 +271,48 @@ async def get_indexing_status(
 @router.delete("/file/{file_id}")
 async def delete_from_index(
     file_id: str,
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    user: CurrentUser,
+    db: DbSession,
 ):
     """
     Remove a file's chunks from the vector store and reset its status.
 
     This allows the file to be re-indexed.
     """
+    # Reset file status (also the ownership check)
     result = await db.execute(
-        select(File).where(File.id == file_id, File.user_id == user.id)
+        update(File)
+        .where(File.id == file_id, File.user_id == user.id)
+        .values(
+            processing_status="pending",
+            processing_error=None,
+            chunk_count=0,
+            contains_visual=False,
+            detected_type=None,
+            processed_at=None,
+            processing_job_id=None,
+        )
+        .returning(File.drive_name)
+        .execution_options(synchronize_session=False)
     )
-    file_record = result.scalar_one_or_none()
-    if not file_record:
+    drive_name = result.scalar_one_or_none()
+    if drive_name is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"File {file_id} not found",
         )
 
-    # Remove from vector store
+    # Remove from vector store — same async session, same transaction.
+    # Savepoint: on a fresh database the pgvector tables may not exist yet.
     try:
-        vector_store = EduverseVectorStore(user_id=user.id)
-        vector_store.delete_by_file(file_id=file_id)
-    except Exception as e:
+        async with db.begin_nested():
+            await db.execute(delete_by_file_stmt(user.id, file_id))
+        invalidate_collection_caches(user.id)
+    except ProgrammingError as e:
         logger.warning(f"Vector store deletion failed (may not exist): {e}")
 
-    # Reset file status
-    file_record.processing_status = "pending"
-    file_record.processing_error = None
-    file_record.chunk_count = 0
-    file_record.contains_visual = False
-    file_record.detected_type = None
-    file_record.processed_at = None
-    await db.flush()
-
     return {
-        "message": f"File '{file_record.drive_name}' removed from index",
+        "message": f"File '{drive_name}' removed from index",
         "file_id": file_id,
         "status": "pending",
     }
@@ -0,0 +1,87 @@
+"""
+Revoked-token blacklist.
+
+Logged-out access tokens are recorded until their natural expiry so
+get_current_user can reject them. Backed by Redis when REDIS_URL is
+set (shared across workers); otherwise falls back to an in-process
+cache, which only covers the worker that handled the logout.
+
+Keys are `blacklist:{sha256(token)}` — raw tokens are never stored.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from typing import Optional
+
+import redis.asyncio as redis
+from cachetools import TTLCache
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = "blacklist:"
+
+_redis: Optional[redis.Redis] = None
+
+# Fallback when Redis isn't configured: digest → exp_epoch.
+# TTL covers the longest-lived access token (30 min).
+_local: TTLCache = TTLCache(maxsize=10_000, ttl=30 * 60)
+_local_lock = threading.Lock()
+
+
+def _get_redis() -> Optional[redis.Redis]:
+    """Lazy-init a module-level Redis client (None if not configured)."""
+    global _redis
+    if _redis is None and settings.REDIS_URL:
+        _redis = redis.from_url(settings.REDIS_URL)
+    return _redis
+
+
+def _digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+async def revoke_token(token: str, exp: float) -> None:
+    """Blacklist a token until its `exp` (epoch seconds)."""
+    ttl = int(exp - time.time())
+    if ttl <= 0:
+        return
+
+    digest = _digest(token)
+    client = _get_redis()
+    if client is None:
+        with _local_lock:
+            _local[digest] = exp
+        return
+
+    try:
+        await client.setex(f"{_KEY_PREFIX}{digest}", ttl, 1)
+    except Exception as e:
+        logger.warning(f"Could not blacklist token in Redis: {e}")
+
+
+async def is_token_revoked(token: str) -> bool:
+    """Return True if the token was revoked (fails open if Redis is down)."""
+    digest = _digest(token)
+    client = _get_redis()
+    if client is None:
+        with _local_lock:
+            exp = _local.get(digest)
+        return exp is not None and exp > time.time()
+
+    try:
+        return bool(await client.exists(f"{_KEY_PREFIX}{digest}"))
+    except Exception as e:
+        logger.warning(f"Could not check token blacklist in Redis: {e}")
+        return False
+
+
+async def close_blacklist() -> None:
+    """Close the Redis client on shutdown."""
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
@@ -0,0 +1,31 @@
+"""
+Response compression.
+
+GZip cuts the large JSON payloads (/files/process chunk lists, course
+file listings) by most of their size. Server-Sent Events must not go
+through it: the compressor buffers, so tokens would stop streaming.
+"""
+
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class SelectiveGZipMiddleware:
+    """GZipMiddleware that bypasses paths ending in one of `exclude_suffixes`."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        compresslevel: int = 5,
+        exclude_suffixes: tuple[str, ...] = ("/stream",),
+    ) -> None:
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.exclude_suffixes = exclude_suffixes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and not scope["path"].endswith(self.exclude_suffixes):
+            await self.gzip(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
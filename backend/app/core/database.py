@@ -9,6 +9,7 @@ asyncpg features including prepared statements.
 import ssl
 from typing import AsyncGenerator
 
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 
@@ -24,18 +25,27 @@ _ssl_context = ssl.create_default_context()
 _ssl_context.check_hostname = False
 _ssl_context.verify_mode = ssl.CERT_NONE
 
+# ── Engine ───────────────────────────────────────────────────────────
+# Sized for bursty traffic while staying well under Supabase's direct
+# connection cap; pool_timeout fails fast instead of queueing forever.
+# JIT is off: it only adds planning time to the short OLTP queries here.
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=settings.DEBUG,
     pool_pre_ping=True,
-    pool_size=8,
-    max_overflow=12,
-    pool_recycle=300,
+    pool_size=20,
+    max_overflow=10,
+    pool_recycle=1800,
+    pool_timeout=10,
     connect_args={
         "ssl": _ssl_context,                       # Supabase: TLS required
         "command_timeout": 180,                    # asyncpg client-side timeout (3 min)
+        "prepared_statement_cache_size": 500,      # SQLAlchemy-side prepared statements
+        "statement_cache_size": 500,               # asyncpg-side statement cache
         "server_settings": {
             "statement_timeout": "180000",          # 3 min server-side (Supabase default is low)
+            "jit": "off",
+            "application_name": "eduverse",
         },
     },
 )
@@ -62,10 +72,26 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             raise
 
 
+# create_all() only creates missing tables — columns and indexes added to
+# existing tables later are applied here. Every statement must be idempotent.
+_SCHEMA_PATCHES = (
+    "ALTER TABLE files ADD COLUMN IF NOT EXISTS processing_job_id VARCHAR(64)",
+    "CREATE INDEX IF NOT EXISTS ix_courses_user_active ON courses (user_id, is_active)",
+    "CREATE INDEX IF NOT EXISTS ix_files_course_deleted ON files (course_id, is_deleted)",
+    "CREATE INDEX IF NOT EXISTS ix_files_course_user_status "
+    "ON files (course_id, user_id, processing_status)",
+    # (user_id, processing_status) replaces the status-only index
+    "CREATE INDEX IF NOT EXISTS ix_files_user_status ON files (user_id, processing_status)",
+    "DROP INDEX IF EXISTS ix_files_processing_status",
+)
+
+
 async def init_db():
     """Create all tables on startup."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        for statement in _SCHEMA_PATCHES:
+            await conn.execute(text(statement))
 
 
 async def close_db():
@@ -0,0 +1,35 @@
+"""
+Shared async HTTP client.
+
+One httpx.AsyncClient per process so outbound calls (Google OAuth,
+userinfo, Classroom, Drive downloads) reuse keep-alive TCP+TLS
+connections instead of opening a new one per request. HTTP/2 lets
+concurrent Drive downloads multiplex over a single connection.
+Closed in the FastAPI lifespan.
+"""
+
+from typing import Optional
+
+import httpx
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get or create the shared AsyncClient."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(30.0, connect=10.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the shared client on shutdown."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,48 @@
+"""
+Shared process pool for CPU-bound work.
+
+Threads don't help pure-Python stages (text splitting, metadata
+normalisation) — they hold the GIL and stall the event loop's thread
+too. Such stages run here instead; network calls stay on the loop.
+
+Workers are started with "spawn": forking a process that already runs
+the logging listener and DB pool threads can deadlock the child.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+PROCESS_POOL_WORKERS = os.cpu_count() or 1
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Lazy-init the module-level process pool."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=PROCESS_POOL_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+async def run_in_process(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Run a picklable module-level function in the process pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), partial(fn, *args, **kwargs))
+
+
+def shutdown_process_pool() -> None:
+    """Stop the worker processes on shutdown."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
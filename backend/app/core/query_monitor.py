@@ -0,0 +1,68 @@
+"""
+Per-request SQL query counter (DEBUG only).
+
+Counts statements executed while a request is being handled and fails
+the request with a 500 when it exceeds `max_queries` — so an N+1
+regression (a lazy relationship access in a loop, a per-row SELECT)
+shows up the first time the route is hit locally instead of as a
+latency graph in production.
+
+Installed only when settings.DEBUG is on; the event hook costs a
+context-var lookup per statement.
+"""
+
+import logging
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+_query_count: ContextVar[Optional[list]] = ContextVar("query_count", default=None)
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany) -> None:
+    counter = _query_count.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+class TooManyQueriesError(RuntimeError):
+    """A request issued more SQL statements than the monitor allows."""
+
+
+class QueryCountMiddleware:
+    """Raise when a request runs more than `max_queries` statements before responding."""
+
+    def __init__(self, app: ASGIApp, engine: Engine, max_queries: int = 10) -> None:
+        self.app = app
+        self.max_queries = max_queries
+        if not event.contains(engine, "before_cursor_execute", _count_query):
+            event.listen(engine, "before_cursor_execute", _count_query)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Mutable cell: SQLAlchemy's greenlets run with a copy of this context
+        counter = [0]
+        token = _query_count.set(counter)
+
+        async def send_checked(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                logger.debug("%s %s ran %d queries", scope["method"], scope["path"], counter[0])
+                if counter[0] > self.max_queries:
+                    raise TooManyQueriesError(
+                        f"{scope['method']} {scope['path']} ran {counter[0]} queries "
+                        f"(max {self.max_queries}) — possible N+1"
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_checked)
+        finally:
+            _query_count.reset(token)
@@ -1,9 +1,10 @@
 import os
-from datetime import datetime, timedelta, timezone
+import time
+from datetime import timedelta
 from typing import Optional
 
 import bcrypt
-from jose import JWTError, jwt
+import jwt
 from cryptography.fernet import Fernet
 
 from app.core.config import settings
@@ -11,19 +12,18 @@ from app.core.config import settings
 fernet = Fernet(settings.FERNET_KEY.encode())
 
 
+def _truncate(password: str) -> bytes:
+    """Bcrypt has a 72-byte limit - we truncate beforehand."""
+    return password.encode('utf-8')[:72]
+
+
 def hash_password(password: str) -> str:
     """
     Hash a password using bcrypt directly (no passlib).
     Bcrypt has a 72-byte limit - we truncate beforehand.
     """
-    # Convert to bytes and truncate to 72 bytes if needed
-    password_bytes = password.encode('utf-8')
-    if len(password_bytes) > 72:
-        password_bytes = password_bytes[:72]
-    
-    salt = bcrypt.gensalt(rounds=12)
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    return hashed.decode('utf-8')
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
+    return bcrypt.hashpw(_truncate(password), salt).decode('utf-8')
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -32,17 +32,16 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Applies same truncation as hash_password.
     """
     try:
-        # Apply same truncation as during hashing
-        password_bytes = plain_password.encode('utf-8')
-        if len(password_bytes) > 72:
-            password_bytes = password_bytes[:72]
-            
-        hashed_bytes = hashed_password.encode('utf-8')
-        return bcrypt.checkpw(password_bytes, hashed_bytes)
+        return bcrypt.checkpw(_truncate(plain_password), hashed_password.encode('utf-8'))
     except Exception:
         return False
 
 
+# ── JWT ──────────────────────────────────────────────────────────────
+ACCESS_TOKEN_TTL = 30 * 60            # seconds
+REFRESH_TOKEN_TTL = 30 * 24 * 60 * 60  # seconds
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token.
@@ -53,12 +52,9 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     """
     to_encode = data.copy()
     
-    if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
-    else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=30)
-    
-    to_encode.update({"exp": expire, "type": "access"})
+    ttl = int(expires_delta.total_seconds()) if expires_delta else ACCESS_TOKEN_TTL
+    # Integer epoch seconds — what PyJWT would serialize a datetime to anyway
+    to_encode.update({"exp": int(time.time()) + ttl, "type": "access"})
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm="HS256")
     return encoded_jwt
 
@@ -73,26 +69,22 @@ def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None)
     """
     to_encode = data.copy()
     
-    if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
-    else:
-        expire = datetime.now(timezone.utc) + timedelta(days=30)
-    
-    to_encode.update({"exp": expire, "type": "refresh"})
+    ttl = int(expires_delta.total_seconds()) if expires_delta else REFRESH_TOKEN_TTL
+    to_encode.update({"exp": int(time.time()) + ttl, "type": "refresh"})
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm="HS256")
     return encoded_jwt
 
 
-def verify_token(token: str, token_type: str = "access") -> Optional[str]:
+def decode_token(token: str, token_type: str = "access") -> Optional[dict]:
     """
-    Verify a JWT token and return the user ID.
+    Verify a JWT token and return its payload.
     
     Args:
         token: JWT token string
         token_type: Either "access" or "refresh"
     
     Returns:
-        User ID if valid, None otherwise
+        Decoded payload (guaranteed to carry "sub") if valid, None otherwise
     """
     try:
         payload = jwt.decode(token, settings.JWT_SECRET, algorithms=["HS256"])
@@ -100,23 +92,51 @@ def verify_token(token: str, token_type: str = "access") -> Optional[str]:
         if payload.get("type") != token_type:
             return None
         
-        user_id: str = payload.get("sub")
-        if user_id is None:
+        if payload.get("sub") is None:
             return None
         
-        return user_id
-    except JWTError:
+        return payload
+    except jwt.InvalidTokenError:
+        return None
+
+
+def verify_token(token: str, token_type: str = "access") -> Optional[str]:
+    """
+    Verify a JWT token and return the user ID.
+    
+    Args:
+        token: JWT token string
+        token_type: Either "access" or "refresh"
+    
+    Returns:
+        User ID if valid, None otherwise
+    """
+    payload = decode_token(token, token_type)
+    if payload is None:
         return None
+    return payload["sub"]
+
+
+def encrypt_token_bytes(token: bytes) -> bytes:
+    """Encrypt raw token bytes with Fernet (ciphertext is base64url ASCII)."""
+    return fernet.encrypt(token)
+
+
+def decrypt_token_bytes(encrypted_token: bytes) -> bytes:
+    """Decrypt Fernet ciphertext back to raw token bytes."""
+    return fernet.decrypt(encrypted_token)
 
 
 def encrypt_token(token: str) -> str:
     """Encrypt a token (e.g., Google refresh token) using Fernet."""
-    return fernet.encrypt(token.encode()).decode()
+    # Ciphertext is base64url — ASCII decode skips UTF-8 validation
+    return encrypt_token_bytes(token.encode()).decode('ascii')
 
 
 def decrypt_token(encrypted_token: str) -> str:
     """Decrypt a token using Fernet."""
-    return fernet.decrypt(encrypted_token.encode()).decode()
+    # Ciphertext is base64url — ASCII encode mirrors encrypt_token
+    return decrypt_token_bytes(encrypted_token.encode('ascii')).decode()
 
 
 def create_token_pair(user_id: str) -> dict:
@@ -19,7 +19,13 @@ def get_sync_engine():
         _sync_engine = create_engine(
             settings.PG_SYNC_URL,
             pool_pre_ping=True,
-            pool_size=3,
-            max_overflow=5,
+            pool_size=settings.SYNC_DB_POOL_SIZE,
+            max_overflow=settings.SYNC_DB_MAX_OVERFLOW,
+            pool_timeout=30,
+            pool_recycle=3600,
+            connect_args={
+                "application_name": "eduverse-sync",
+                "options": "-c jit=off",
+            },
         )
     return _sync_engine
@@ -0,0 +1,48 @@
+"""
+arq task-queue connection (Redis).
+
+The API process only enqueues; jobs run in a separate arq worker
+(`arq app.workflows.worker.WorkerSettings`), so multi-minute indexing
+never shares an event loop or memory with request handling.
+
+When REDIS_URL is unset there is no pool and callers fall back to
+in-process BackgroundTasks (local development).
+"""
+
+import logging
+from typing import Optional
+
+from arq import create_pool
+from arq.connections import ArqRedis, RedisSettings
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ArqRedis] = None
+
+
+def redis_settings() -> RedisSettings:
+    """arq connection settings derived from REDIS_URL (localhost if unset)."""
+    return RedisSettings.from_dsn(settings.REDIS_URL or "redis://localhost:6379")
+
+
+async def init_task_queue() -> None:
+    """Create the shared arq pool on startup (no-op without REDIS_URL)."""
+    global _pool
+    if _pool is None and settings.REDIS_URL:
+        _pool = await create_pool(redis_settings())
+        logger.info("arq task queue connected")
+
+
+def get_task_queue() -> Optional[ArqRedis]:
+    """FastAPI dependency: the arq pool, or None when no queue is configured."""
+    return _pool
+
+
+async def close_task_queue() -> None:
+    """Close the arq pool on shutdown."""
+    global _pool
+    if _pool is not None:
+        await _pool.aclose()
+        _pool = None
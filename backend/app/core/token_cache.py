@@ -0,0 +1,55 @@
+"""
+In-process cache of verified access tokens.
+
+get_current_user runs on every authenticated request, and each call
+would otherwise re-verify the JWT signature. Verified tokens are cached
+for up to a minute, keyed by a 16-byte BLAKE2b digest of the token so
+raw tokens never sit in memory. An entry is never served past the
+token's own `exp` claim.
+
+Logout evicts the entry on the worker that handled it; other workers
+may keep serving a revoked token for at most TOKEN_CACHE_TTL.
+
+Callers verify the token themselves (security.decode_token) and only
+cache it once every check, including the revocation blacklist, passed.
+"""
+
+import hashlib
+import threading
+import time
+from typing import Optional
+
+from cachetools import TTLCache
+
+TOKEN_CACHE_SIZE = 10_000
+TOKEN_CACHE_TTL = 60  # seconds
+
+# key: blake2b(token) digest → (user_id, exp_epoch)
+_cache: TTLCache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
+_lock = threading.Lock()
+
+
+def _cache_key(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+def get_cached_user_id(token: str) -> Optional[str]:
+    """Return the user ID for a previously verified, unexpired token."""
+    with _lock:
+        entry = _cache.get(_cache_key(token))
+    if entry is None:
+        return None
+    user_id, exp = entry
+    return user_id if exp > time.time() else None
+
+
+def cache_token(token: str, user_id: str, exp: float) -> None:
+    """Remember a verified token until min(TTL, exp)."""
+    with _lock:
+        _cache[_cache_key(token)] = (user_id, float(exp))
+
+
+def evict_token(token: str) -> None:
+    """Drop a token from the cache (e.g. on logout)."""
+    with _lock:
+        _cache.pop(_cache_key(token), None)
@@ -0,0 +1,79 @@
+"""
+In-process cache of authenticated user rows.
+
+get_current_user would otherwise SELECT the users row on every
+authenticated request. The row changes rarely (login, deactivation),
+so a short-lived snapshot keyed by user_id is served instead.
+Invalidate with `invalidate_user()` whenever the row is written.
+"""
+
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from cachetools import TTLCache
+
+USER_CACHE_SIZE = 10_000
+USER_CACHE_TTL = 30  # seconds
+
+
+@dataclass(frozen=True, slots=True)
+class CachedUser:
+    """Detached, read-only snapshot of the columns request handlers use."""
+
+    id: str
+    email: str
+    name: Optional[str]
+    picture: Optional[str]
+    is_active: bool
+    created_at: Optional[datetime]
+    last_login: Optional[datetime]
+
+    @staticmethod
+    def columns() -> tuple:
+        """User columns to SELECT — avoids hydrating a full ORM instance."""
+        from app.models.database import User
+
+        return (
+            User.id,
+            User.email,
+            User.name,
+            User.picture,
+            User.is_active,
+            User.created_at,
+            User.last_login,
+        )
+
+    @classmethod
+    def from_orm(cls, user) -> "CachedUser":
+        """Build from a User instance or a Row selected via columns()."""
+        return cls(
+            id=user.id,
+            email=user.email,
+            name=user.name,
+            picture=user.picture,
+            is_active=bool(user.is_active),
+            created_at=user.created_at,
+            last_login=user.last_login,
+        )
+
+
+USER_CACHE: TTLCache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+_lock = threading.Lock()
+
+
+def get_cached_user(user_id: str) -> Optional[CachedUser]:
+    with _lock:
+        return USER_CACHE.get(user_id)
+
+
+def cache_user(user: CachedUser) -> None:
+    with _lock:
+        USER_CACHE[user.id] = user
+
+
+def invalidate_user(user_id: str) -> None:
+    """Drop a user's snapshot (call after login, logout or deactivation)."""
+    with _lock:
+        USER_CACHE.pop(user_id, None)
@@ -1,29 +1,106 @@
+import asyncio
+import logging
+import os
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+import backoff
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from starlette.middleware.sessions import SessionMiddleware
 from app.core.config import settings
-from app.core.database import init_db, close_db
+from app.core.database import engine, init_db, close_db
+from app.core.blacklist import close_blacklist
+from app.core.compression import SelectiveGZipMiddleware
+from app.core.http_client import close_http_client
+from app.core.task_queue import init_task_queue, close_task_queue
+from app.core.logging_config import setup_logging, stop_logging
+from app.core.process_pool import shutdown_process_pool
+from app.core.query_monitor import QueryCountMiddleware
+from app.services.google_auth import start_credentials_refresher, stop_credentials_refresher
+from app.rag.agent import close_checkpointer
 
+from app.api.dependencies import require_ready
 from app.api.routes import auth, classroom, files, indexing, chat
 
+logger = logging.getLogger(__name__)
+
+
+# How long deferred startup keeps retrying a database / Redis that is
+# not reachable yet before giving up and exiting the process
+STARTUP_RETRY_SECONDS = 120
+
+
+@backoff.on_exception(
+    backoff.expo, Exception, max_time=STARTUP_RETRY_SECONDS, max_value=15, logger=logger
+)
+async def _init_dependencies() -> None:
+    """Create DB tables and connect the task queue (both idempotent, so retryable)."""
+    await init_db()
+    await init_task_queue()
+
+
+async def _deferred_init(app: FastAPI) -> None:
+    """
+    Heavy startup work, run after the server is already listening.
+
+    Retries with backoff; if the dependencies are still unreachable after
+    STARTUP_RETRY_SECONDS the process exits non-zero so the orchestrator
+    restarts it, instead of lingering live but never ready.
+    """
+    try:
+        await _init_dependencies()
+    except Exception:
+        logger.exception("Deferred startup failed; exiting")
+        stop_logging()
+        os._exit(1)
+    start_credentials_refresher()
+    app.state.ready = True
+    logger.info("Startup complete")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Startup: create DB tables. Shutdown: close DB connections."""
-    await init_db()
+    """
+    Startup: bind immediately, then create DB tables, connect the task queue
+    and start token refresh in the background (/health/ready reports when done;
+    API routes answer 503 until then).
+    Shutdown: stop and close everything.
+    """
+    app.state.ready = False
+    init_task = asyncio.create_task(_deferred_init(app))
     yield
+    if not init_task.done():
+        init_task.cancel()
+        await asyncio.gather(init_task, return_exceptions=True)
+    await stop_credentials_refresher()
+    await close_task_queue()
+    await close_checkpointer()
     await close_db()
+    await close_blacklist()
+    await close_http_client()
+    shutdown_process_pool()
+    stop_logging()
 
 
 def create_application() -> FastAPI:
+    setup_logging(logging.DEBUG if settings.DEBUG else logging.INFO)
+
     application = FastAPI(
         title=settings.PROJECT_NAME,
         openapi_url=f"{settings.API_V1_STR}/openapi.json",
         lifespan=lifespan,
+        default_response_class=ORJSONResponse,
     )
 
+    # Dev only: fail requests that run an N+1 number of queries
+    if settings.DEBUG:
+        application.add_middleware(QueryCountMiddleware, engine=engine.sync_engine, max_queries=10)
+
+    # Modest level: large JSON shrinks ~80% without much worker CPU.
+    # SSE (/chat/query/stream) is left uncompressed so tokens still flush.
+    application.add_middleware(SelectiveGZipMiddleware, minimum_size=1024, compresslevel=5)
+
     # Set all CORS enabled origins
     if settings.BACKEND_CORS_ORIGINS:
         application.add_middleware(
@@ -40,11 +117,14 @@ def create_application() -> FastAPI:
         https_only=not settings.DEBUG  # True in production, False in local dev
     )
 
-    application.include_router(auth.router, prefix="/auth", tags=["auth"])
-    application.include_router(classroom.router, prefix="/classroom", tags=["classroom"])
-    application.include_router(files.router, prefix="/files", tags=["files"])
-    application.include_router(indexing.router, prefix="/indexing", tags=["indexing"])
-    application.include_router(chat.router, prefix="/chat", tags=["chat"])
+    # Every router needs the database (and indexing the task queue), so
+    # they all wait for deferred startup instead of taking fallbacks
+    ready = [Depends(require_ready)]
+    application.include_router(auth.router, prefix="/auth", tags=["auth"], dependencies=ready)
+    application.include_router(classroom.router, prefix="/classroom", tags=["classroom"], dependencies=ready)
+    application.include_router(files.router, prefix="/files", tags=["files"], dependencies=ready)
+    application.include_router(indexing.router, prefix="/indexing", tags=["indexing"], dependencies=ready)
+    application.include_router(chat.router, prefix="/chat", tags=["chat"], dependencies=ready)
     
     return application
 
@@ -57,9 +137,17 @@ def root():
 
 @app.get("/health")
 def health_check():
-    """Health check for monitoring and deployment verification."""
+    """Liveness check for monitoring and deployment verification."""
     return {
         "status": "healthy",
         "version": "1.1.0",
         "service": "eduverse-ai-tutor",
     }
+
+
+@app.get("/health/ready")
+def readiness_check(request: Request):
+    """Readiness check: 503 until deferred startup (DB, task queue) has finished."""
+    if not request.app.state.ready:
+        return ORJSONResponse({"status": "starting"}, status_code=503)
+    return {"status": "ready"}
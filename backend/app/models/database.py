@@ -69,6 +69,7 @@ class Course(Base):
     
     __table_args__ = (
         Index("ix_courses_user_classroom", "user_id", "classroom_id", unique=True),
+        Index("ix_courses_user_active", "user_id", "is_active"),
     )
     
     def __repr__(self):
@@ -92,11 +93,12 @@ class File(Base):
     
     local_path = Column(String(1024), nullable=True)
     file_size = Column(BigInteger, nullable=True)  # 64-bit: supports files > 2.1 GB
-    file_hash = Column(String(64), nullable=True)  
+    file_hash = Column(String(64), nullable=True)  # hex blake2b-256 or sha256 (FILE_HASH_ALGORITHM)
     
     processing_status = Column(String(50), default="pending")  
     processing_error = Column(Text, nullable=True)
     processed_at = Column(DateTime(timezone=True), nullable=True)
+    processing_job_id = Column(String(64), nullable=True)  # arq job id
     
     vector_store_id = Column(String(255), nullable=True)
     chunk_count = Column(Integer, default=0)
@@ -113,7 +115,9 @@ class File(Base):
     
     __table_args__ = (
         Index("ix_files_user_drive", "user_id", "drive_id", unique=True),
-        Index("ix_files_processing_status", "processing_status"),
+        Index("ix_files_user_status", "user_id", "processing_status"),
+        Index("ix_files_course_deleted", "course_id", "is_deleted"),
+        Index("ix_files_course_user_status", "course_id", "user_id", "processing_status"),
     )
     
     def __repr__(self):
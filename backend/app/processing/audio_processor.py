@@ -1,12 +1,13 @@
 import asyncio
 import logging
 import os
-import tempfile
+from pathlib import Path
 from typing import List, Optional
 
-from groq import Groq
 from langchain_core.documents import Document
 
+from app.processing.groq_clients import get_async_groq
+from app.processing.metadata import source_metadata
 from app.processing.text_cleaner import clean_transcription
 
 logger = logging.getLogger(__name__)
@@ -15,17 +16,22 @@ SUPPORTED_AUDIO_FORMATS = {'.mp3', '.wav', '.m4a', '.ogg', '.flac', '.webm', '.m
 MAX_FILE_SIZE = 25 * 1024 * 1024  
 SEGMENT_DURATION = 30  
 
-def _transcribe_sync(audio_path: str, groq_api_key: str) -> dict:
-    """Synchronous Whisper transcription — called via asyncio.to_thread()."""
-    client = Groq(api_key=groq_api_key)
+async def _transcribe(audio_path: str, groq_api_key: str) -> dict:
+    """Transcribe audio via Groq Whisper API with timestamps (non-blocking)."""
+    client = get_async_groq(groq_api_key)
 
-    with open(audio_path, 'rb') as f:
-        response = client.audio.transcriptions.create(
-            file=(os.path.basename(audio_path), f),
+    try:
+        # Whisper caps uploads at MAX_FILE_SIZE, so reading it whole is bounded
+        audio_bytes = await asyncio.to_thread(Path(audio_path).read_bytes)
+        response = await client.audio.transcriptions.create(
+            file=(os.path.basename(audio_path), audio_bytes),
             model="whisper-large-v3",
             response_format="verbose_json",
             timestamp_granularities=["segment"],
         )
+    except Exception as e:
+        logger.error(f"Whisper transcription failed: {e}")
+        return {"text": "", "segments": [], "duration": None}
 
     segments = []
     if hasattr(response, 'segments') and response.segments:
@@ -43,15 +49,6 @@ def _transcribe_sync(audio_path: str, groq_api_key: str) -> dict:
     }
 
 
-async def _transcribe(audio_path: str, groq_api_key: str) -> dict:
-    """Transcribe audio via Groq Whisper API with timestamps (non-blocking)."""
-    try:
-        return await asyncio.to_thread(_transcribe_sync, audio_path, groq_api_key)
-    except Exception as e:
-        logger.error(f"Whisper transcription failed: {e}")
-        return {"text": "", "segments": [], "duration": None}
-
-
 def _group_segments(segments: List[dict], target_duration: int = SEGMENT_DURATION) -> List[dict]:
     """Group short Whisper segments into ~30s chunks for meaningful embeddings."""
     if not segments:
@@ -97,40 +94,22 @@ async def process_audio(
             if text:
                 documents.append(Document(
                     page_content=f"[AUDIO] {text}",
-                    metadata={
-                        "source_type": "audio", "source_id": source, "file_name": file_name,
-                        "course_id": course_id, "page_number": None,
-                        "start_time": round(g["start"], 1), "end_time": round(g["end"], 1),
-                        "contains_visual": False,
-                    }
+                    metadata=source_metadata(
+                        "audio", source, file_name, course_id,
+                        start_time=round(g["start"], 1), end_time=round(g["end"], 1),
+                    ),
                 ))
     else:
         text = clean_transcription(result["text"])
         if text:
             documents.append(Document(
                 page_content=f"[AUDIO] {text}",
-                metadata={
-                    "source_type": "audio", "source_id": source, "file_name": file_name,
-                    "course_id": course_id, "page_number": None,
-                    "start_time": 0, "end_time": result.get("duration"),
-                    "contains_visual": False,
-                }
+                metadata=source_metadata(
+                    "audio", source, file_name, course_id,
+                    start_time=0, end_time=result.get("duration"),
+                ),
             ))
 
     logger.info(f"Processed audio '{file_name}': {len(documents)} segments")
     return documents
 
-
-async def process_audio_bytes(
-    audio_bytes: bytes, groq_api_key: str,
-    file_name: str = "audio.mp3", course_id: Optional[str] = None, source_id: Optional[str] = None,
-) -> List[Document]:
-    """Process audio from bytes (uploaded file)."""
-    ext = os.path.splitext(file_name)[1] or ".mp3"
-    with tempfile.NamedTemporaryFile(suffix=ext, delete=False) as tmp:
-        tmp.write(audio_bytes)
-        tmp_path = tmp.name
-    try:
-        return await process_audio(tmp_path, groq_api_key, file_name, course_id, source_id)
-    finally:
-        os.unlink(tmp_path)
\ No newline at end of file
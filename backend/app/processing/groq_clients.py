@@ -0,0 +1,51 @@
+"""
+Reused Groq clients for the processors.
+
+Users bring their own Groq key, so clients can't be module singletons;
+instead one client per (model, key) is kept for a while after last use.
+All of them ride the shared httpx pool, so vision and Whisper calls
+reuse warm TCP+TLS connections instead of handshaking per call.
+"""
+
+from typing import Tuple
+
+from cachetools import TTLCache
+from groq import AsyncGroq
+from langchain_groq import ChatGroq
+
+from app.core.http_client import get_http_client
+
+CLIENT_CACHE_SIZE = 256
+CLIENT_IDLE_TTL = 900  # seconds
+
+_vision_llms: "TTLCache[Tuple[str, str], ChatGroq]" = TTLCache(
+    maxsize=CLIENT_CACHE_SIZE, ttl=CLIENT_IDLE_TTL
+)
+_async_clients: "TTLCache[str, AsyncGroq]" = TTLCache(
+    maxsize=CLIENT_CACHE_SIZE, ttl=CLIENT_IDLE_TTL
+)
+
+
+def get_vision_llm(model: str, api_key: str) -> ChatGroq:
+    """ChatGroq vision model for this key, built once and reused."""
+    key = (model, api_key)
+    llm = _vision_llms.get(key)
+    if llm is None:
+        llm = ChatGroq(
+            model=model,
+            api_key=api_key,
+            max_tokens=1024,
+            temperature=0.2,
+            http_async_client=get_http_client(),
+        )
+    _vision_llms[key] = llm  # re-set refreshes the idle TTL
+    return llm
+
+
+def get_async_groq(api_key: str) -> AsyncGroq:
+    """AsyncGroq SDK client for this key (Whisper), built once and reused."""
+    client = _async_clients.get(api_key)
+    if client is None:
+        client = AsyncGroq(api_key=api_key, http_client=get_http_client())
+    _async_clients[api_key] = client
+    return client
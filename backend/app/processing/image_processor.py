@@ -1,11 +1,13 @@
-import base64
 import logging
 from typing import Optional
 
-from langchain_groq import ChatGroq
+import pybase64
 from langchain_core.documents import Document
 from langchain_core.messages import HumanMessage
 
+from app.processing.groq_clients import get_vision_llm
+from app.processing.metadata import source_metadata
+
 logger = logging.getLogger(__name__)
 
 SUPPORTED_IMAGE_FORMATS = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp', '.tiff'}
@@ -25,8 +27,9 @@ async def analyze_image(
 ) -> str:
     """Analyze image using ChatGroq vision via LangChain messages API."""
     try:
-        llm = ChatGroq(model=model, api_key=groq_api_key, max_tokens=1024, temperature=0.2)
-        b64 = base64.b64encode(image_bytes).decode("utf-8")
+        llm = get_vision_llm(model, groq_api_key)
+        # SIMD base64 (multi-MB slides/frames); output is ASCII by definition
+        b64 = pybase64.b64encode(image_bytes).decode("ascii")
 
         msg = HumanMessage(content=[
             {"type": "text", "text": prompt},
@@ -52,14 +55,7 @@ async def process_image(
 
     return Document(
         page_content=f"[VISUAL]\n{description}",
-        metadata={
-            "source_type": "image",
-            "source_id": source_id or file_name,
-            "file_name": file_name,
-            "course_id": course_id,
-            "page_number": None,
-            "start_time": None,
-            "end_time": None,
-            "contains_visual": True,
-        }
+        metadata=source_metadata(
+            "image", source_id or file_name, file_name, course_id, contains_visual=True,
+        ),
     )
\ No newline at end of file
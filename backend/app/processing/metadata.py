@@ -0,0 +1,40 @@
+"""
+Shared metadata schema for processed Documents.
+
+Every processor emits the same eight keys. Building them from one
+interned key tuple keeps a single copy of each key string, so the
+thousands of per-page/per-segment dicts (and their pickled copies
+coming back from the process pool) share keys instead of each
+carrying their own.
+"""
+
+import sys
+from typing import Any, Dict, Optional
+
+META_KEYS = tuple(sys.intern(k) for k in (
+    "source_type",
+    "source_id",
+    "file_name",
+    "course_id",
+    "page_number",
+    "start_time",
+    "end_time",
+    "contains_visual",
+))
+
+
+def source_metadata(
+    source_type: str,
+    source_id: str,
+    file_name: str,
+    course_id: Optional[str],
+    page_number: Optional[int] = None,
+    start_time: Optional[float] = None,
+    end_time: Optional[float] = None,
+    contains_visual: bool = False,
+) -> Dict[str, Any]:
+    """Metadata dict in the Eduverse schema (see META_KEYS)."""
+    return dict(zip(META_KEYS, (
+        source_type, source_id, file_name, course_id,
+        page_number, start_time, end_time, contains_visual,
+    )))
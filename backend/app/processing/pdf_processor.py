@@ -2,52 +2,107 @@ import asyncio
 import logging
 import os
 import tempfile
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
-from langchain_community.document_loaders import PyMuPDFLoader
-from langchain_community.document_loaders.parsers import LLMImageBlobParser
-from langchain_groq import ChatGroq
+import fitz  # PyMuPDF
 from langchain_core.documents import Document
 
+from app.core.config import settings
+from app.processing.image_processor import analyze_image
+from app.processing.metadata import source_metadata
+
 logger = logging.getLogger(__name__)
 
+# get_text()'s defaults plus dehyphenation, so words split across line
+# breaks ("algo-\nrithm") reach the chunker and embedder whole
+TEXT_FLAGS = (
+    fitz.TEXT_PRESERVE_LIGATURES
+    | fitz.TEXT_PRESERVE_WHITESPACE
+    | fitz.TEXT_MEDIABOX_CLIP
+    | fitz.TEXT_DEHYPHENATE
+)
 
-def _build_loader(
-    file_path: str,
-    groq_api_key: str,
-    vision_model: str = "meta-llama/llama-4-scout-17b-16e-instruct",
-) -> PyMuPDFLoader:
-    """Build a PyMuPDFLoader with Groq Vision for image analysis."""
-    vision_llm = ChatGroq(
-        model=vision_model,
-        api_key=groq_api_key,
-        max_tokens=1024,
-        temperature=0.2,
-    )
 
-    return PyMuPDFLoader(
-        file_path,
-        mode="page",
-        images_inner_format="markdown-img",
-        images_parser=LLMImageBlobParser(model=vision_llm),
+def _extract_pages(file_path: str) -> Tuple[List[Tuple[str, List[int]]], Dict[int, bytes]]:
+    """
+    Pull text and embedded images out of a PDF (synchronous, CPU-bound).
+
+    Returns:
+        ([(page_text, [image_xref, ...]) per page], {xref: image_bytes})
+        Images are keyed by xref so a logo repeated on every page is
+        only sent to the vision model once.
+    """
+    pages = []
+    images: Dict[int, bytes] = {}
+    with fitz.open(file_path) as pdf:
+        for page in pdf:
+            xrefs = []
+            for img in page.get_images(full=True):
+                xref = img[0]
+                if xref not in images:
+                    extracted = pdf.extract_image(xref)
+                    if not extracted or not extracted.get("image"):
+                        continue
+                    images[xref] = extracted["image"]
+                xrefs.append(xref)
+            pages.append((page.get_text("text", flags=TEXT_FLAGS), xrefs))
+    return pages, images
+
+
+async def _load_pdf(file_path: str, groq_api_key: str) -> List[Document]:
+    """
+    Extract pages, then describe every embedded image concurrently.
+
+    Vision calls are network-bound, so they fan out with asyncio.gather
+    (bounded by GROQ_VISION_CONCURRENCY) instead of running one after
+    another inside the loader.
+    """
+    pages, images = await asyncio.to_thread(_extract_pages, file_path)
+
+    semaphore = asyncio.Semaphore(settings.GROQ_VISION_CONCURRENCY)
+
+    async def _describe(image_bytes: bytes) -> str:
+        async with semaphore:
+            return await analyze_image(image_bytes, groq_api_key)
+
+    xrefs = list(images)
+    results = await asyncio.gather(
+        *(_describe(images[x]) for x in xrefs), return_exceptions=True
     )
+    descriptions = {
+        xref: desc
+        for xref, desc in zip(xrefs, results)
+        if isinstance(desc, str) and desc and not desc.startswith("[Image analysis failed")
+    }
+
+    docs = []
+    for page_number, (text, page_xrefs) in enumerate(pages):
+        visuals = [descriptions[x] for x in page_xrefs if x in descriptions]
+        content = text
+        if visuals:
+            content += "\n\n[VISUAL]\n" + "\n\n".join(visuals)
+        docs.append(Document(
+            page_content=content,
+            metadata={
+                "source": file_path,
+                "page": page_number,
+                "total_pages": len(pages),
+                "contains_visual": bool(visuals),
+            },
+        ))
+    return docs
 
 
 def _enrich_metadata(doc: Document, file_name: str, course_id: Optional[str], source_id: Optional[str]) -> Document:
-    """Add Eduverse schema fields to PyMuPDFLoader's metadata."""
-    content = doc.page_content
-    has_visual = "[VISUAL]" in content or "![" in content
-
-    doc.metadata.update({
-        "source_type": "pdf",
-        "source_id": source_id or file_name,
-        "file_name": file_name,
-        "course_id": course_id,
-        "page_number": doc.metadata.get("page", 0) + 1,
-        "start_time": None,
-        "end_time": None,
-        "contains_visual": has_visual,
-    })
+    """Add Eduverse schema fields to the page metadata."""
+    # Set by _load_pdf when it appends vision output — no need to rescan the text
+    has_visual = doc.metadata.get("contains_visual", False)
+
+    doc.metadata.update(source_metadata(
+        "pdf", source_id or file_name, file_name, course_id,
+        page_number=doc.metadata.get("page", 0) + 1,
+        contains_visual=has_visual,
+    ))
     return doc
 
 
@@ -59,8 +114,8 @@ async def process_pdf(
     source_id: Optional[str] = None,
 ) -> List[Document]:
     """
-    Process PDF using LangChain PyMuPDFLoader + ChatGroq Vision.
-    Extracts text per page, analyzes images with Groq Vision automatically.
+    Process PDF using PyMuPDF + ChatGroq Vision.
+    Extracts text per page, analyzes images with Groq Vision concurrently.
 
     Returns:
         List of LangChain Documents with per-page content + metadata
@@ -70,9 +125,7 @@ async def process_pdf(
         tmp_path = tmp.name
 
     try:
-        loader = _build_loader(tmp_path, groq_api_key)
-        # loader.load() is synchronous (PyMuPDF + Groq Vision) — run in thread
-        docs = await asyncio.to_thread(loader.load)
+        docs = await _load_pdf(tmp_path, groq_api_key)
 
         enriched = [
             _enrich_metadata(doc, file_name, course_id, source_id)
@@ -96,14 +149,19 @@ async def process_pdf_file(
     file_name: Optional[str] = None,
     course_id: Optional[str] = None,
     source_id: Optional[str] = None,
+    raise_errors: bool = False,
 ) -> List[Document]:
-    """Process PDF from file path (no temp file needed)."""
+    """
+    Process PDF from file path (no temp file needed).
+
+    Returns [] on failure unless raise_errors is set, in which case it
+    raises RuntimeError like process_pdf().
+    """
     if file_name is None:
         file_name = os.path.basename(file_path)
 
     try:
-        loader = _build_loader(file_path, groq_api_key)
-        docs = await asyncio.to_thread(loader.load)
+        docs = await _load_pdf(file_path, groq_api_key)
 
         enriched = [
             _enrich_metadata(doc, file_name, course_id, source_id)
@@ -116,4 +174,6 @@ async def process_pdf_file(
 
     except Exception as e:
         logger.error(f"PDF processing failed for '{file_name}': {e}")
+        if raise_errors:
+            raise RuntimeError(f"PDF processing failed: {e}") from e
         return []
\ No newline at end of file
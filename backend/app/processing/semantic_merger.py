@@ -7,27 +7,153 @@ Improvements over basic chunking:
 2. Parent-child: Small chunks (300 chars) for precise retrieval,
    full parent content (800 chars) stored in metadata for richer LLM context.
 3. Document type: Auto-detected from filename (lab/assignment/exam/lecture).
+4. Near-duplicate chunks (repeated slide boilerplate, copy-pasted
+   sections) are dropped with MinHash-LSH before they are embedded.
+5. Optionally, low-information chunks (little new vocabulary vs. the
+   chunks just before them in the same document) are dropped as well.
 """
 
 import logging
+import multiprocessing
+import os
+import re
 import uuid
-from typing import List, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import FrozenSet, Iterator, List, Optional, Tuple
 
+from datasketch import MinHash, MinHashLSH
 from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from semantic_text_splitter import TextSplitter
+from tokenizers import Tokenizer
+
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# One pass over the filename; the matching group picks the type. Wrapped
+# in a lookahead so overlapping keywords ("notest") are all seen.
+_DOCTYPE_RE = re.compile(
+    r"(?=(lab|practical)|(assign|homework|hw)|(quiz|exam|test|midterm|final)|(lect|slide|note|chapter))"
+)
+_DOCTYPES = (None, "lab", "assignment", "exam", "lecture")
+
+# MinHash-LSH near-duplicate detection over word 3-shingles
+DEDUPE_THRESHOLD = 0.85
+MINHASH_PERM = 128
+
+# Entropy-aware filter: score = α·novel_terms + (1-α)·(1 - Jaccard(prev chunk))
+# Lossy and off by default — pass redundancy_threshold to opt in. The
+# splitter overlap makes neighbouring chunks look more alike than they
+# are, so keep the threshold low. Suggested value:
+REDUNDANCY_THRESHOLD = 0.3
+REDUNDANCY_ALPHA = 0.5
+REDUNDANCY_WINDOW = 3  # previous chunks the novelty term is measured against
+_TERM_RE = re.compile(r"\w{3,}")
+
+# Splitter threads per process. Kept small: inside the shared process
+# pool (cpu_count workers already) documents are split serially instead.
+SPLIT_THREADS = min(4, os.cpu_count() or 1)
+
+_split_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _get_split_pool() -> Optional[ThreadPoolExecutor]:
+    """Threads for splitting documents in parallel (lazy; None in pool workers)."""
+    global _split_pool
+    if multiprocessing.parent_process() is not None or SPLIT_THREADS < 2:
+        return None
+    if _split_pool is None:
+        _split_pool = ThreadPoolExecutor(
+            max_workers=SPLIT_THREADS, thread_name_prefix="splitter"
+        )
+    return _split_pool
+
+
+def _terms(text: str) -> FrozenSet[str]:
+    """Lowercase word terms (3+ chars) — a cheap stand-in for entities."""
+    return frozenset(_TERM_RE.findall(text.lower()))
+
+
+def _information_score(terms: FrozenSet[str], window: deque, alpha: float) -> float:
+    """
+    SimpleMem-style score in [0, 1]: share of terms not seen in the recent
+    window, blended with lexical distance from the immediately preceding
+    chunk. A chunk with no terms (formulas, short code, numeric tables)
+    can't be judged this way and scores 1, so it is always kept.
+    """
+    if not terms or not window:
+        return 1.0
+    seen = frozenset().union(*window)
+    novelty = len(terms - seen) / len(terms)
+    prev = window[-1]
+    jaccard = len(terms & prev) / len(terms | prev)
+    return alpha * novelty + (1 - alpha) * (1 - jaccard)
+
+
+@lru_cache(maxsize=4)
+def _load_tokenizer(name: str) -> Tokenizer:
+    """Hugging Face tokenizer, loaded once per process."""
+    return Tokenizer.from_pretrained(name)
+
+
+def _join_overlapping(a: str, b: str, max_overlap: int) -> str:
+    """Concatenate adjacent chunks, dropping the splitter overlap b repeats from a."""
+    # Ignore matches under 5 chars — those are coincidence, not overlap
+    for k in range(min(max_overlap, len(a), len(b)), 4, -1):
+        if a.endswith(b[:k]):
+            return a + b[k:]
+    return f"{a} {b}"
+
+
+def _minhash(text: str) -> MinHash:
+    """MinHash signature over lowercase word 3-shingles (whole text if shorter)."""
+    words = text.lower().split()
+    if len(words) < 3:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + 3]) for i in range(len(words) - 2)}
+    signature = MinHash(num_perm=MINHASH_PERM)
+    signature.update_batch([s.encode("utf-8") for s in shingles])
+    return signature
+
 
 class SemanticMerger:
     """Chunks and normalizes documents with contextual enrichment."""
 
-    def __init__(self, chunk_size: int = 300, chunk_overlap: int = 50):
-        self.splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            separators=["\n\n", "\n", ". ", " ", ""],
-        )
+    def __init__(
+        self,
+        chunk_size: int = 300,
+        chunk_overlap: int = 50,
+        dedupe_threshold: Optional[float] = DEDUPE_THRESHOLD,
+        redundancy_threshold: Optional[float] = None,
+        alpha: float = REDUNDANCY_ALPHA,
+        tokenizer: Optional[str] = None,
+    ):
+        # Rust splitter: same paragraph → line → sentence → word cascade
+        # as RecursiveCharacterTextSplitter, no GIL. Sized in characters,
+        # or in tokens of `tokenizer` (a Hugging Face model id) when set —
+        # counting then happens inside the Rust splitter, not through a
+        # Python length_function called on every candidate split.
+        if tokenizer:
+            self.splitter = TextSplitter.from_huggingface_tokenizer(
+                _load_tokenizer(tokenizer), chunk_size, overlap=chunk_overlap
+            )
+        else:
+            self.splitter = TextSplitter(chunk_size, overlap=chunk_overlap)
+        # Split-then-merge: fragments under a third of the target are folded
+        # into a neighbour, up to a third over the target. Character-sized
+        # only — lengths are compared with len().
+        self.chunk_overlap = chunk_overlap
+        self.merge_tiny = not tokenizer
+        self.min_chunk_size = chunk_size // 3
+        self.max_chunk_size = chunk_size + chunk_size // 3
+        # None disables deduplication / the information filter (the
+        # latter is opt-in: it drops chunks, see REDUNDANCY_THRESHOLD)
+        self.dedupe_threshold = dedupe_threshold
+        self.redundancy_threshold = redundancy_threshold
+        self.alpha = alpha
 
     def merge_and_chunk(
         self,
@@ -35,43 +161,109 @@ class SemanticMerger:
         course_id: Optional[str] = None,
         course_name: Optional[str] = None,
     ) -> List[Document]:
+        """Split documents into contextually-enriched chunks (see iter_chunks)."""
+        return list(self.iter_chunks(documents, course_id, course_name))
+
+    def iter_chunks(
+        self,
+        documents: List[Document],
+        course_id: Optional[str] = None,
+        course_name: Optional[str] = None,
+    ) -> Iterator[Document]:
         """
-        Split documents into contextually-enriched chunks.
+        Yield contextually-enriched chunks as they are produced.
 
         Each chunk gets:
           - A context prefix (file name, page number)
           - Parent content in metadata (for richer LLM answers)
           - Normalized metadata with document_type
+
+        Chunks that are near-duplicates of an earlier one (Jaccard ≥
+        dedupe_threshold) are skipped, as are chunks scoring below
+        redundancy_threshold on _information_score() when it is set.
         """
         if not documents:
-            return []
+            return
 
-        all_chunks = []
-        for doc in documents:
-            # Build context prefix from metadata
-            prefix = self._build_prefix(doc.metadata)
+        # The splitter runs native code without the GIL, so documents are
+        # split concurrently when this process has a split pool; results
+        # come back in input order.
+        pool = _get_split_pool() if len(documents) > 1 else None
+        if pool is not None:
+            split = list(pool.map(self._chunk_one, documents))
+        else:
+            split = [self._chunk_one(doc) for doc in documents]
 
-            # Store original content as parent (truncated to 800 chars)
-            parent_content = doc.page_content[:800]
+        lsh = (
+            MinHashLSH(threshold=self.dedupe_threshold, num_perm=MINHASH_PERM)
+            if self.dedupe_threshold is not None
+            else None
+        )
+        dropped = low_info = kept = 0
 
-            # Split into small child chunks
-            children = self.splitter.split_text(doc.page_content)
+        for doc, (prefix, parent_content, children) in zip(documents, split):
+            # Build normalized metadata with parent content (once per doc)
+            base_meta = self._normalize(doc.metadata, course_id, course_name)
+            base_meta["parent_content"] = parent_content
+            window: deque = deque(maxlen=REDUNDANCY_WINDOW)
 
             for child_text in children:
-                # Prepend context prefix to chunk content
-                enriched_content = f"{prefix}{child_text}"
+                if self.redundancy_threshold is not None:
+                    terms = _terms(child_text)
+                    score = _information_score(terms, window, self.alpha)
+                    if terms:
+                        window.append(terms)
+                    if score < self.redundancy_threshold:
+                        low_info += 1
+                        continue
 
-                # Build normalized metadata with parent content
-                meta = self._normalize(doc.metadata, course_id, course_name)
-                meta["parent_content"] = parent_content
+                if lsh is not None:
+                    # Compare chunk text only — the per-page prefix would mask repeats
+                    signature = _minhash(child_text)
+                    if lsh.query(signature):
+                        dropped += 1
+                        continue
+                    lsh.insert(str(kept), signature)
 
-                all_chunks.append(Document(
-                    page_content=enriched_content,
-                    metadata=meta,
-                ))
+                kept += 1
+                yield Document(
+                    # Prepend context prefix to chunk content
+                    page_content=f"{prefix}{child_text}",
+                    metadata=dict(base_meta),
+                )
 
-        logger.info(f"Merged {len(documents)} docs → {len(all_chunks)} chunks (contextual)")
-        return all_chunks
+        logger.info(
+            f"Merged {len(documents)} docs → {kept} chunks (contextual, "
+            f"{dropped} near-duplicates, {low_info} low-information dropped)"
+        )
+
+    def _chunk_one(self, doc: Document) -> Tuple[str, str, List[str]]:
+        """Prefix, parent content (first 800 chars) and child chunks for one doc."""
+        return (
+            self._build_prefix(doc.metadata),
+            doc.page_content[:800],
+            self._merge_tiny(self.splitter.chunks(doc.page_content)),
+        )
+
+    def _merge_tiny(self, chunks: List[str]) -> List[str]:
+        """
+        Second pass over the splitter output: greedily join each chunk under
+        min_chunk_size with its neighbour while the result stays within
+        max_chunk_size. Nothing can come out over max_chunk_size, so no
+        re-split pass is needed.
+        """
+        if not self.merge_tiny or len(chunks) < 2:
+            return chunks
+
+        merged = [chunks[0]]
+        for chunk in chunks[1:]:
+            prev = merged[-1]
+            tiny = len(prev) < self.min_chunk_size or len(chunk) < self.min_chunk_size
+            if tiny and len(prev) + len(chunk) + 1 <= self.max_chunk_size:
+                merged[-1] = _join_overlapping(prev, chunk, self.chunk_overlap)
+            else:
+                merged.append(chunk)
+        return merged
 
     def _build_prefix(self, meta: dict) -> str:
         """Build a context prefix like '[From LAB 1.pdf, page 2] '."""
@@ -99,15 +291,48 @@ class SemanticMerger:
         }
 
     @staticmethod
+    @lru_cache(maxsize=1024)
     def _detect_doc_type(file_name: str) -> str:
         """Auto-detect document type from filename."""
-        name = file_name.lower()
-        if any(k in name for k in ("lab", "practical")):
-            return "lab"
-        if any(k in name for k in ("assign", "homework", "hw")):
-            return "assignment"
-        if any(k in name for k in ("quiz", "exam", "test", "midterm", "final")):
-            return "exam"
-        if any(k in name for k in ("lect", "slide", "note", "chapter")):
-            return "lecture"
-        return "document"
\ No newline at end of file
+        # Lowest group wins, matching the old lab → assignment → exam → lecture order
+        groups = [m.lastindex for m in _DOCTYPE_RE.finditer(file_name.lower())]
+        return _DOCTYPES[min(groups)] if groups else "document"
+
+
+def merge_and_chunk(
+    documents: List[Document],
+    course_id: Optional[str] = None,
+    course_name: Optional[str] = None,
+    chunk_size: int = 300,
+    chunk_overlap: int = 50,
+) -> List[Document]:
+    """
+    Module-level (picklable) entry point for running in a process pool.
+
+    chunk_size/chunk_overlap count tokens when settings.CHUNK_TOKENIZER is set.
+    """
+    merger = SemanticMerger(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        tokenizer=settings.CHUNK_TOKENIZER,
+    )
+    return merger.merge_and_chunk(documents, course_id, course_name)
+
+
+def merge_and_chunk_payload(
+    documents: List[Document],
+    course_id: Optional[str] = None,
+    course_name: Optional[str] = None,
+) -> List[dict]:
+    """
+    Like merge_and_chunk(), but returns the API shape {"text", "metadata"}.
+
+    Built inside the pool worker, so the parent unpickles plain dicts
+    instead of Document objects it would only convert again.
+    """
+    return [
+        {"text": chunk.page_content, "metadata": chunk.metadata}
+        for chunk in SemanticMerger(tokenizer=settings.CHUNK_TOKENIZER).iter_chunks(
+            documents, course_id, course_name
+        )
+    ]
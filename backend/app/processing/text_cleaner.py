@@ -1,5 +1,23 @@
 import re
 
+# ── Patterns (compiled once at import) ───────────────────────────────
+# Spoken fillers and [annotations] in one pass
+_RE_TRANSCRIPT_NOISE = re.compile(r'\b(?:um|uh|eh|ah|hmm|hm)\b|\[.*?\]', re.IGNORECASE)
+# Bare page numbers ("- 3 -") and "Page N (of M)" lines in one pass; the
+# closing newline is a lookahead so back-to-back artifact lines all match
+_RE_PAGE_ARTIFACT = re.compile(
+    r'\n\s*(?:-?\s*\d+\s*-?|Page\s+\d+\s*(?:of\s+\d+)?)\s*(?=\n)', re.IGNORECASE
+)
+_RE_HYPHEN = re.compile(r'(\w+)-\s*\n\s*(\w+)')
+# Whitespace in one pass: 3+ (blank) line breaks | trailing blanks | blank runs
+_RE_WS = re.compile(r'((?:[ \t]*\n){3,})|([ \t]+\n)|([ \t]+)')
+_WS_REPLACEMENTS = (None, '\n\n', '\n', ' ')
+
+# One-pass bullet normalization (nested bullets keep their indent)
+_BULLET_TABLE = str.maketrans(
+    {**dict.fromkeys('•●▪▸►', '- '), **dict.fromkeys('◦○', '  - ')}
+)
+
 class TextCleaner:
     """Text cleaning utilities for all extracted content."""
     
@@ -25,31 +43,21 @@ def clean_transcription(text: str) -> str:
     """Clean audio transcription: remove fillers and annotations."""
     if not text:
         return ""
-    text = re.sub(r'\b(um|uh|eh|ah|hmm|hm)\b', '', text, flags=re.IGNORECASE)
-    text = re.sub(r'\[.*?\]', '', text)  
+    text = _RE_TRANSCRIPT_NOISE.sub('', text)
     return clean_text(text)
 
 def _remove_page_artifacts(text: str) -> str:
     """Remove PDF headers, footers, page numbers."""
-    text = re.sub(r'\n\s*-?\s*\d+\s*-?\s*\n', '\n', text)
-    text = re.sub(r'\n\s*Page\s+\d+\s*(?:of\s+\d+)?\s*\n', '\n', text, flags=re.IGNORECASE)
-    return text
+    return _RE_PAGE_ARTIFACT.sub('', text)
 
 def _fix_hyphenation(text: str) -> str:
     """Fix words broken across lines: back-\npropagation → backpropagation."""
-    return re.sub(r'(\w+)-\s*\n\s*(\w+)', r'\1\2', text)
+    return _RE_HYPHEN.sub(r'\1\2', text)
 
 def _standardize_bullets(text: str) -> str:
     """Normalize bullet characters to dashes."""
-    for char in '•●▪▸►':
-        text = text.replace(char, '- ')
-    for char in '◦○':
-        text = text.replace(char, '  - ')
-    return text
+    return text.translate(_BULLET_TABLE)
 
 def _normalize_whitespace(text: str) -> str:
     """Collapse excessive whitespace, preserve paragraph breaks."""
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    text = re.sub(r'[ \t]+', ' ', text)
-    text = re.sub(r' +\n', '\n', text)
-    return text
\ No newline at end of file
+    return _RE_WS.sub(lambda m: _WS_REPLACEMENTS[m.lastindex], text)
\ No newline at end of file
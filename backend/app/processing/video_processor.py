@@ -1,14 +1,19 @@
+import asyncio
 import logging
 import os
 import re
 import subprocess
 import tempfile
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
 from typing import List, Optional, Tuple
 
 from langchain_core.documents import Document
 
+from app.core.config import settings
 from app.processing.audio_processor import _transcribe, _group_segments
 from app.processing.image_processor import analyze_image
+from app.processing.metadata import source_metadata
 from app.processing.text_cleaner import clean_transcription
 
 logger = logging.getLogger(__name__)
@@ -16,19 +21,26 @@ logger = logging.getLogger(__name__)
 SUPPORTED_VIDEO_FORMATS = {'.mp4', '.avi', '.mkv', '.mov', '.webm', '.flv', '.wmv'}
 MAX_KEY_FRAMES = 15
 SEGMENT_DURATION = 30
+FRAME_PROMPT = (
+    "This frame is from an educational video. "
+    "Describe slides, diagrams, code, or whiteboard content shown."
+)
 
 
-def _extract_audio(video_path: str, output_path: str) -> bool:
-    """Extract audio from video using FFmpeg."""
+def _probe_streams(video_path: str) -> Tuple[bool, bool]:
+    """(has_audio, has_video) via FFprobe; assumes both if probing fails."""
     try:
         result = subprocess.run(
-            ["ffmpeg", "-i", video_path, "-vn", "-acodec", "libmp3lame", "-q:a", "4", "-y", output_path],
-            capture_output=True, text=True, timeout=300,
+            ["ffprobe", "-v", "quiet", "-show_entries", "stream=codec_type",
+             "-of", "csv=p=0", video_path],
+            capture_output=True, text=True, timeout=30,
         )
-        return result.returncode == 0 and os.path.exists(output_path)
-    except (FileNotFoundError, subprocess.TimeoutExpired) as e:
-        logger.error(f"Audio extraction failed: {e}")
-        return False
+        if result.returncode == 0:
+            types = set(result.stdout.split())
+            return "audio" in types, "video" in types
+    except Exception:
+        pass
+    return True, True
 
 
 def _get_duration(video_path: str) -> Optional[float]:
@@ -44,45 +56,78 @@ def _get_duration(video_path: str) -> Optional[float]:
         return None
 
 
-def _extract_frames(video_path: str, output_dir: str) -> List[Tuple[float, str]]:
-    """Extract key frames using FFmpeg scene detection, fallback to interval."""
+def _extract_interval_frames(video_path: str, output_dir: str) -> List[Tuple[float, str]]:
+    """Fallback when scene detection finds nothing: one frame per fixed interval."""
     frames = []
-
+    duration = _get_duration(video_path) or 300
+    interval = max(SEGMENT_DURATION, duration / MAX_KEY_FRAMES)
     try:
         subprocess.run(
-            ["ffmpeg", "-i", video_path, "-vf", "select='gt(scene,0.3)',showinfo",
-             "-vsync", "vfr", "-q:v", "3", os.path.join(output_dir, "scene_%04d.jpg"), "-y"],
-            capture_output=True, text=True, timeout=300,
+            ["ffmpeg", "-i", video_path, "-vf", f"fps=1/{int(interval)}", "-q:v", "3",
+             os.path.join(output_dir, "frame_%04d.jpg"), "-y"],
+            capture_output=True, timeout=300,
         )
+        ts = 0.0
+        for i in range(1, MAX_KEY_FRAMES + 1):
+            path = os.path.join(output_dir, f"frame_{i:04d}.jpg")
+            if os.path.exists(path):
+                frames.append((ts, path))
+                ts += interval
+            else:
+                break
+    except Exception as e:
+        logger.error(f"Frame extraction failed: {e}")
+    return frames
+
+
+def _extract_av(
+    video_path: str, output_dir: str, audio_path: str, with_frames: bool = True
+) -> Tuple[bool, List[Tuple[float, str]]]:
+    """
+    Extract the audio track and scene-change key frames with one FFmpeg
+    run (one demux/decode of the file), falling back to interval frames.
+
+    Blocking — call via a thread. Returns (audio_extracted, [(ts, frame_path)]).
+    """
+    has_audio, has_video = _probe_streams(video_path)
+    with_frames = with_frames and has_video
+
+    # One input, up to two outputs; streams the file lacks are left out
+    # so a missing track doesn't fail the whole run
+    cmd = ["ffmpeg", "-y", "-i", video_path]
+    if has_audio:
+        cmd += ["-map", "0:a:0", "-acodec", "libmp3lame", "-q:a", "4", audio_path]
+    if with_frames:
+        cmd += ["-map", "0:v:0", "-vf", "select='gt(scene,0.3)',showinfo",
+                "-vsync", "vfr", "-q:v", "3", os.path.join(output_dir, "scene_%04d.jpg")]
+
+    if has_audio or with_frames:
+        try:
+            subprocess.run(cmd, capture_output=True, text=True, timeout=600)
+        except (FileNotFoundError, subprocess.TimeoutExpired) as e:
+            logger.error(f"FFmpeg extraction failed: {e}")
+
+    audio_ok = has_audio and os.path.exists(audio_path) and os.path.getsize(audio_path) > 0
 
+    frames = []
+    if with_frames:
         for i in range(1, MAX_KEY_FRAMES + 1):
             path = os.path.join(output_dir, f"scene_{i:04d}.jpg")
             if os.path.exists(path):
                 frames.append((i * SEGMENT_DURATION, path))
-    except Exception:
-        pass
+        if not frames:
+            frames = _extract_interval_frames(video_path, output_dir)
+
+    return audio_ok, frames[:MAX_KEY_FRAMES]
 
-    if not frames:
-        duration = _get_duration(video_path) or 300
-        interval = max(SEGMENT_DURATION, duration / MAX_KEY_FRAMES)
-        try:
-            subprocess.run(
-                ["ffmpeg", "-i", video_path, "-vf", f"fps=1/{int(interval)}", "-q:v", "3",
-                 os.path.join(output_dir, "frame_%04d.jpg"), "-y"],
-                capture_output=True, timeout=300,
-            )
-            ts = 0.0
-            for i in range(1, MAX_KEY_FRAMES + 1):
-                path = os.path.join(output_dir, f"frame_{i:04d}.jpg")
-                if os.path.exists(path):
-                    frames.append((ts, path))
-                    ts += interval
-                else:
-                    break
-        except Exception as e:
-            logger.error(f"Frame extraction failed: {e}")
 
-    return frames[:MAX_KEY_FRAMES]
+def _read_frames(frames: List[Tuple[float, str]]) -> List[Tuple[float, bytes]]:
+    """Load extracted frame files (blocking — call via a thread)."""
+    loaded = []
+    for ts, path in frames:
+        with open(path, 'rb') as f:
+            loaded.append((ts, f.read()))
+    return loaded
 
 
 async def process_video(
@@ -103,67 +148,77 @@ async def process_video(
 
     with tempfile.TemporaryDirectory() as tmpdir:
         audio_path = os.path.join(tmpdir, "audio.mp3")
+        audio_ok, frame_paths = await asyncio.to_thread(
+            _extract_av, video_path, tmpdir, audio_path, analyze_frames
+        )
+
         transcript = {"text": "", "segments": []}
-        if _extract_audio(video_path, audio_path):
+        if audio_ok:
             transcript = await _transcribe(audio_path, groq_api_key)
 
         grouped = _group_segments(transcript.get("segments", []), SEGMENT_DURATION)
 
         frame_analyses = []
         if analyze_frames:
-            for ts, fpath in _extract_frames(video_path, tmpdir):
-                try:
-                    with open(fpath, 'rb') as f:
-                        desc = await analyze_image(
-                            f.read(), groq_api_key,
-                            prompt="This frame is from an educational video. Describe slides, diagrams, code, or whiteboard content shown."
-                        )
-                    if desc and "[Image analysis failed" not in desc:
-                        frame_analyses.append({"timestamp": ts, "content": desc})
-                except Exception as e:
-                    logger.warning(f"Frame analysis failed at {ts}s: {e}")
+            frames = await asyncio.to_thread(_read_frames, frame_paths)
+            semaphore = asyncio.Semaphore(settings.GROQ_VISION_CONCURRENCY)
+
+            async def _describe(image_bytes: bytes) -> str:
+                async with semaphore:
+                    return await analyze_image(image_bytes, groq_api_key, prompt=FRAME_PROMPT)
+
+            results = await asyncio.gather(
+                *(_describe(b) for _, b in frames), return_exceptions=True
+            )
+            for (ts, _), desc in zip(frames, results):
+                if isinstance(desc, BaseException):
+                    logger.warning(f"Frame analysis failed at {ts}s: {desc}")
+                elif desc and "[Image analysis failed" not in desc:
+                    frame_analyses.append({"timestamp": ts, "content": desc})
 
         if grouped:
+            # Frames sorted once; each segment slices its window by bisection
+            frame_analyses.sort(key=itemgetter("timestamp"))
+            frame_times = [fa["timestamp"] for fa in frame_analyses]
+
             for seg in grouped:
                 text = clean_transcription(seg["text"])
-                content = f"[AUDIO] {text}" if text else ""
+                parts = [f"[AUDIO] {text}"] if text else []
 
-                visuals = [fa for fa in frame_analyses if seg["start"] <= fa["timestamp"] <= seg["end"]]
+                visuals = frame_analyses[
+                    bisect_left(frame_times, seg["start"]):bisect_right(frame_times, seg["end"])
+                ]
                 if visuals:
-                    content += "\n\n[VISUAL]\n" + "\n".join(v["content"] for v in visuals)
+                    parts.append("[VISUAL]\n" + "\n".join(v["content"] for v in visuals))
 
+                content = "\n\n".join(parts)
                 if content.strip():
                     documents.append(Document(
                         page_content=content,
-                        metadata={
-                            "source_type": "video", "source_id": source, "file_name": file_name,
-                            "course_id": course_id, "page_number": None,
-                            "start_time": round(seg["start"], 1), "end_time": round(seg["end"], 1),
-                            "contains_visual": bool(visuals),
-                        }
+                        metadata=source_metadata(
+                            "video", source, file_name, course_id,
+                            start_time=round(seg["start"], 1), end_time=round(seg["end"], 1),
+                            contains_visual=bool(visuals),
+                        ),
                     ))
         elif frame_analyses:
             for fa in frame_analyses:
                 documents.append(Document(
                     page_content=f"[VISUAL]\n{fa['content']}",
-                    metadata={
-                        "source_type": "video", "source_id": source, "file_name": file_name,
-                        "course_id": course_id, "page_number": None,
-                        "start_time": round(fa["timestamp"], 1), "end_time": None,
-                        "contains_visual": True,
-                    }
+                    metadata=source_metadata(
+                        "video", source, file_name, course_id,
+                        start_time=round(fa["timestamp"], 1), contains_visual=True,
+                    ),
                 ))
         elif transcript["text"]:
             text = clean_transcription(transcript["text"])
             if text:
                 documents.append(Document(
                     page_content=f"[AUDIO] {text}",
-                    metadata={
-                        "source_type": "video", "source_id": source, "file_name": file_name,
-                        "course_id": course_id, "page_number": None,
-                        "start_time": 0, "end_time": transcript.get("duration"),
-                        "contains_visual": False,
-                    }
+                    metadata=source_metadata(
+                        "video", source, file_name, course_id,
+                        start_time=0, end_time=transcript.get("duration"),
+                    ),
                 ))
 
     logger.info(f"Processed video '{file_name}': {len(documents)} segments")
@@ -4,19 +4,24 @@ LangGraph ReAct agent for the Eduverse AI tutor.
 Autonomous agent with 4 tools: search_course_materials, search_web,
 generate_flashcards, and summarize_topic.
 
-Uses PostgresSaver with connection pooling for persistent memory.
+Uses AsyncPostgresSaver with connection pooling for persistent memory,
+so the agent runs natively on the event loop (ainvoke / astream). The
+sync PostgresSaver is kept for session-history reads in memory.py.
 """
 
 import asyncio
-import json
 import logging
+import threading
+import time
 from typing import AsyncGenerator, Optional
 
+import orjson
 from langchain_core.messages import HumanMessage
 from langchain_groq import ChatGroq
 from langgraph.checkpoint.postgres import PostgresSaver
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
 from langgraph.prebuilt import create_react_agent
-from psycopg_pool import ConnectionPool
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
 
 from app.core.config import settings
 from app.rag.prompts import AGENT_SYSTEM_PROMPT
@@ -26,6 +31,17 @@ logger = logging.getLogger(__name__)
 
 # ── Connection pool (created once, reused across requests) ────────
 
+_POOL_KWARGS = {
+    "autocommit": True,
+    # Checkpoint queries are a handful of fixed statements run every turn;
+    # prepare them server-side on first execution (0) instead of after 5
+    "prepare_threshold": 0,
+    "keepalives": 1,
+    "keepalives_idle": 60,
+    "keepalives_interval": 15,
+    "keepalives_count": 3,
+}
+
 _pool: ConnectionPool | None = None
 
 
@@ -37,20 +53,34 @@ def _get_pool() -> ConnectionPool:
             conninfo=settings.PG_CONNINFO,
             min_size=2,
             max_size=10,
-            kwargs={
-                "autocommit": True,
-                "keepalives": 1,
-                "keepalives_idle": 60,
-                "keepalives_interval": 15,
-                "keepalives_count": 3,
-            },
+            kwargs=_POOL_KWARGS,
             max_idle=300,       # close connections idle > 5 min
             reconnect_timeout=60,
         )
     return _pool
 
 
+_checkpointer: PostgresSaver | None = None
+_checkpointer_lock = threading.Lock()
+
+
 def _get_checkpointer() -> PostgresSaver:
+    """
+    Return the shared PostgresSaver, creating it on first use.
+
+    setup() (idempotent DDL) only runs until it first succeeds; later
+    agent builds reuse the same saver without touching Postgres.
+    """
+    global _checkpointer
+    if _checkpointer is not None:
+        return _checkpointer
+    with _checkpointer_lock:
+        if _checkpointer is None:
+            _checkpointer = _create_checkpointer()
+    return _checkpointer
+
+
+def _create_checkpointer() -> PostgresSaver:
     """
     Create a PostgresSaver backed by the shared connection pool.
 
@@ -65,6 +95,7 @@ def _get_checkpointer() -> PostgresSaver:
         try:
             checkpointer = PostgresSaver(pool)
             checkpointer.setup()
+            _create_session_indexes(pool)
             return checkpointer
         except Exception as e:
             logger.warning(
@@ -79,11 +110,72 @@ def _get_checkpointer() -> PostgresSaver:
                     _pool.close()
                     _pool = None
                     pool = _get_pool()
-                import time
                 time.sleep(0.5 * (attempt + 1))
             else:
                 raise
 
+# Session listing filters checkpoints by a byte-wise prefix range
+# (`thread_id ~>=~ lo AND thread_id ~<~ hi`). Those operators are only
+# served by a text_pattern_ops index; the default btree opclass follows
+# the database collation. Built CONCURRENTLY — the pool is autocommit.
+_SESSION_INDEXES = (
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_checkpoints_thread_id_pattern "
+    "ON checkpoints (thread_id text_pattern_ops)",
+)
+
+
+def _create_session_indexes(pool: ConnectionPool) -> None:
+    """Best effort: a failed index build only costs speed, not correctness."""
+    try:
+        with pool.connection() as conn:
+            for statement in _SESSION_INDEXES:
+                conn.execute(statement)
+    except Exception as e:
+        logger.warning(f"Could not create session indexes: {e}")
+
+
+_async_checkpointer: AsyncPostgresSaver | None = None
+_async_pool: AsyncConnectionPool | None = None
+_async_lock = asyncio.Lock()
+
+
+async def _get_async_checkpointer() -> AsyncPostgresSaver:
+    """
+    Return the shared AsyncPostgresSaver used by agents.
+
+    The checkpoint tables are created through the sync saver's setup()
+    (with its retry loop), once, in a thread; the async pool is opened
+    on first use and closed by close_checkpointer().
+    """
+    global _async_checkpointer, _async_pool
+    if _async_checkpointer is not None:
+        return _async_checkpointer
+    async with _async_lock:
+        if _async_checkpointer is None:
+            await asyncio.to_thread(_get_checkpointer)
+            _async_pool = AsyncConnectionPool(
+                conninfo=settings.PG_CONNINFO,
+                min_size=2,
+                max_size=10,
+                kwargs=_POOL_KWARGS,
+                max_idle=300,
+                reconnect_timeout=60,
+                open=False,
+            )
+            await _async_pool.open()
+            _async_checkpointer = AsyncPostgresSaver(_async_pool)
+    return _async_checkpointer
+
+
+async def close_checkpointer() -> None:
+    """Close the async checkpoint pool on shutdown."""
+    global _async_checkpointer, _async_pool
+    if _async_pool is not None:
+        await _async_pool.close()
+    _async_pool = None
+    _async_checkpointer = None
+
+
 # ── History trimming ──────────────────────────────────────────────
 # Tool call messages contain large document content. Without trimming,
 # long conversations exceed the LLM's context window.
@@ -116,7 +208,7 @@ def _make_prompt(state: dict):
 
 # ── Agent builder ─────────────────────────────────────────────────
 
-def build_tutor_agent(
+async def build_tutor_agent(
     user_id: str,
     groq_api_key: str,
     course_id: Optional[str] = None,
@@ -141,7 +233,7 @@ def build_tutor_agent(
         model=llm,
         tools=tools,
         prompt=_make_prompt,      # callable: trims history before each LLM call
-        checkpointer=_get_checkpointer(),
+        checkpointer=await _get_async_checkpointer(),
     )
 
     return agent
@@ -171,7 +263,7 @@ async def invoke_agent(
     last_error = None
     for attempt in range(MAX_RETRIES):
         try:
-            result = await asyncio.to_thread(agent.invoke, inputs, config)
+            result = await agent.ainvoke(inputs, config)
             messages = result.get("messages", [])
             answer = _extract_final_answer(messages)
             return {"answer": answer, "messages": messages}
@@ -195,40 +287,40 @@ async def stream_agent(
     agent,
     query: str,
     session_id: str,
-) -> AsyncGenerator[str, None]:
+) -> AsyncGenerator[bytes, None]:
     """
     Stream the agent's response as Server-Sent Events (SSE).
 
-    Yields SSE-formatted strings: 'data: {"type": ..., "content": ...}\n\n'
+    Yields SSE-formatted bytes: b'data: {"type": ..., "content": ...}\n\n'
     """
     config = {"configurable": {"thread_id": session_id}}
     inputs = {"messages": [HumanMessage(content=query)]}
 
-    def _stream_sync():
-        """Run agent.stream() synchronously (called via to_thread)."""
-        chunks = []
-        for event in agent.stream(inputs, config, stream_mode="updates"):
-            chunks.append(event)
-        return chunks
-
-    events = await asyncio.to_thread(_stream_sync)
-
-    for event in events:
+    # Each node's update is framed and sent as soon as the node finishes
+    async for event in agent.astream(inputs, config, stream_mode="updates"):
         for node_name, node_output in event.items():
             messages = node_output.get("messages", [])
             for msg in messages:
                 if hasattr(msg, "tool_call_id"):
                     # Tool result
-                    yield f"data: {json.dumps({'type': 'tool_result', 'tool': getattr(msg, 'name', 'unknown'), 'content': msg.content[:200]})}\n\n"
+                    yield _sse({'type': 'tool_result', 'tool': getattr(msg, 'name', 'unknown'), 'content': msg.content[:200]})
                 elif hasattr(msg, "tool_calls") and msg.tool_calls:
                     # Agent deciding to call a tool
                     for tc in msg.tool_calls:
-                        yield f"data: {json.dumps({'type': 'tool_call', 'tool': tc['name'], 'args': str(tc.get('args', {}))[:200]})}\n\n"
+                        yield _sse({'type': 'tool_call', 'tool': tc['name'], 'args': str(tc.get('args', {}))[:200]})
                 elif hasattr(msg, "content") and msg.content:
                     # Final answer or intermediate reasoning
-                    yield f"data: {json.dumps({'type': 'answer', 'content': msg.content})}\n\n"
+                    yield _sse({'type': 'answer', 'content': msg.content})
+
+    yield _SSE_DONE
+
+
+_SSE_DONE = b"data: [DONE]\n\n"
+
 
-    yield "data: [DONE]\n\n"
+def _sse(payload: dict) -> bytes:
+    """Frame one SSE event. Bytes are sent as-is by StreamingResponse."""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
 
 
 # ── Helper ────────────────────────────────────────────────────────
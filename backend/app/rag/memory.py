@@ -29,17 +29,24 @@ def list_user_sessions(user_id: str) -> List[str]:
 
     Queries the checkpoints table where thread_id
     starts with the user's ID prefix (format: {user_id}_{uuid}).
+
+    The prefix match is a half-open range [user_id + "_", user_id + "`")
+    using the byte-wise ~>=~ / ~<~ operators: always a range scan on the
+    text_pattern_ops index, whatever the database locale, and "_" is
+    matched literally instead of as a LIKE wildcard.
     """
+    lo = f"{user_id}_"
+    hi = lo[:-1] + chr(ord(lo[-1]) + 1)
     try:
         engine = get_sync_engine()
         with engine.connect() as conn:
             result = conn.execute(
                 text(
                     "SELECT DISTINCT thread_id FROM checkpoints "
-                    "WHERE thread_id LIKE :prefix "
+                    "WHERE thread_id ~>=~ :lo AND thread_id ~<~ :hi "
                     "ORDER BY thread_id"
                 ),
-                {"prefix": f"{user_id}_%"},
+                {"lo": lo, "hi": hi},
             )
             return [row[0] for row in result]
     except Exception as e:
@@ -52,23 +59,23 @@ def clear_session(session_id: str) -> bool:
     Clear a session's checkpoint data.
 
     Returns True if any rows were deleted.
+
+    All three tables are cleared by one statement (data-modifying CTEs),
+    so the whole delete is a single round-trip.
     """
     try:
         engine = get_sync_engine()
         with engine.begin() as conn:
-            r1 = conn.execute(
-                text("DELETE FROM checkpoint_writes WHERE thread_id = :tid"),
-                {"tid": session_id},
-            )
-            r2 = conn.execute(
-                text("DELETE FROM checkpoint_blobs WHERE thread_id = :tid"),
-                {"tid": session_id},
-            )
-            r3 = conn.execute(
-                text("DELETE FROM checkpoints WHERE thread_id = :tid"),
+            deleted = conn.execute(
+                text(
+                    "WITH w AS (DELETE FROM checkpoint_writes WHERE thread_id = :tid RETURNING 1), "
+                    "b AS (DELETE FROM checkpoint_blobs WHERE thread_id = :tid RETURNING 1), "
+                    "c AS (DELETE FROM checkpoints WHERE thread_id = :tid RETURNING 1) "
+                    "SELECT (SELECT count(*) FROM w) + (SELECT count(*) FROM b) "
+                    "+ (SELECT count(*) FROM c)"
+                ),
                 {"tid": session_id},
-            )
-            deleted = (r1.rowcount or 0) + (r2.rowcount or 0) + (r3.rowcount or 0)
+            ).scalar_one()
 
         if deleted:
             logger.info(f"Cleared session: {session_id} ({deleted} rows)")
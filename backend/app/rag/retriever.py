@@ -10,8 +10,10 @@ Pipeline:  [BM25 (keyword) + MMR (semantic)] → Merge → FlashRank reranking
 """
 
 import logging
+import threading
 from typing import Optional
 
+from cachetools import TTLCache
 from langchain_community.document_compressors.flashrank_rerank import FlashrankRerank
 from langchain_community.retrievers import BM25Retriever
 from langchain_classic.retrievers.contextual_compression import ContextualCompressionRetriever
@@ -19,10 +21,46 @@ from langchain_classic.retrievers.ensemble import EnsembleRetriever
 from langchain_core.retrievers import BaseRetriever
 
 from app.core.config import settings
-from app.rag.vector_store import EduverseVectorStore
+from app.rag.vector_store import EduverseVectorStore, collection_generation
 
 logger = logging.getLogger(__name__)
 
+# ── BM25 index cache ─────────────────────────────────────────────────
+# Loading up to BM25_CORPUS_LIMIT chunks and tokenizing them into an
+# inverted index is the costliest step of build_retriever. The index
+# only changes when the collection does, so reuse it per
+# (user, collection generation); the TTL picks up chunks indexed by
+# the worker process, which can't bump this process's generation.
+# An empty collection is cached as None for the same window; a failed
+# load raises and is not cached.
+BM25_CORPUS_LIMIT = 500
+_bm25_cache: TTLCache = TTLCache(maxsize=256, ttl=60)
+_bm25_lock = threading.Lock()
+
+
+def _get_bm25_retriever(vs: EduverseVectorStore) -> Optional[BM25Retriever]:
+    """
+    Cached BM25 retriever over the user's chunks.
+
+    None means the collection is empty; that is cached too, so it doubles
+    as build_retriever's emptiness check without a COUNT(*). Load errors
+    propagate (uncached) so a transient failure isn't taken for "empty".
+    """
+    key = (vs.user_id, collection_generation(vs.user_id))
+    with _bm25_lock:
+        if key in _bm25_cache:
+            return _bm25_cache[key]
+
+    all_docs = vs.get_all_documents(limit=BM25_CORPUS_LIMIT)
+    bm25 = (
+        BM25Retriever.from_documents(all_docs, k=settings.RAG_RETRIEVER_K)
+        if all_docs
+        else None
+    )
+    with _bm25_lock:
+        _bm25_cache[key] = bm25
+    return bm25
+
 
 def build_retriever(
     user_id: str,
@@ -47,16 +85,27 @@ def build_retriever(
 
     vs = EduverseVectorStore(user_id=user_id)
 
-    # Pre-check: if collection is empty, return a simple vector retriever
-    info = vs.collection_info()
-    if info["count"] == 0:
+    # ── Step 1: BM25 retriever (keyword matching) ──────────────────
+    # In-memory index over up to 500 docs, cached until the collection
+    # changes. Loading it also tells us whether the collection is empty,
+    # so there is no separate COUNT(*) round-trip.
+    bm25_failed = False
+    try:
+        bm25_retriever = _get_bm25_retriever(vs)
+    except Exception as e:
+        # Load failed — emptiness unknown, so keep the full pipeline
+        # without the keyword leg rather than the empty-collection fallback
+        logger.warning(f"Could not load documents for BM25: {e}")
+        bm25_retriever, bm25_failed = None, True
+
+    if bm25_retriever is None and not bm25_failed:
         logger.warning(
-            f"User {user_id} has an empty collection — "
-            f"queries will return no results"
+            "User %s has an empty collection — queries will return no results",
+            user_id,
         )
         return vs.get_retriever(search_type="mmr", search_kwargs={"k": 5})
 
-    # ── Step 1: Vector retriever (MMR for diversity) ───────────────
+    # ── Step 2: Vector retriever (MMR for diversity) ───────────────
     search_kwargs = {
         "k": settings.RAG_RETRIEVER_K * 2,      # fetch more for reranking
         "fetch_k": settings.RAG_RETRIEVER_FETCH_K,
@@ -69,30 +118,20 @@ def build_retriever(
         search_kwargs=search_kwargs,
     )
 
-    # ── Step 2: BM25 retriever (keyword matching) ──────────────────
-    # Load docs for BM25 indexing (in-memory, fast for <500 docs)
-    all_docs = vs.get_all_documents(limit=500)
-
-    if all_docs:
-        bm25_retriever = BM25Retriever.from_documents(
-            all_docs,
-            k=settings.RAG_RETRIEVER_K,
-        )
-
-        # ── Step 3: Merge BM25 + Vector with ensemble ─────────────
-        ensemble_retriever = EnsembleRetriever(
+    # ── Step 3: Merge BM25 + Vector with ensemble ─────────────────
+    if bm25_retriever is not None:
+        base_retriever = EnsembleRetriever(
             retrievers=[bm25_retriever, vector_retriever],
             weights=[0.3, 0.7],  # favor semantic, include keyword matches
         )
-        base_retriever = ensemble_retriever
         logger.info(
-            f"Hybrid retriever built: BM25({len(all_docs)} docs, w=0.3) + "
-            f"MMR(k={search_kwargs['k']}, w=0.7)"
+            "Hybrid retriever built: BM25(%d docs, w=0.3) + MMR(k=%d, w=0.7)",
+            len(bm25_retriever.docs), search_kwargs["k"],
         )
     else:
         # Fallback: vector-only if BM25 loading fails
         base_retriever = vector_retriever
-        logger.info(f"Vector-only retriever built: MMR(k={search_kwargs['k']})")
+        logger.info("Vector-only retriever built: MMR(k=%d)", search_kwargs["k"])
 
     # ── Step 4: FlashRank reranking (local cross-encoder) ──────────
     reranker = FlashrankRerank(
@@ -104,7 +143,7 @@ def build_retriever(
         base_retriever=base_retriever,
     )
     logger.info(
-        f"Retrieval pipeline complete → FlashRank(top_n={settings.RAG_RERANK_TOP_N})"
+        "Retrieval pipeline complete → FlashRank(top_n=%d)", settings.RAG_RERANK_TOP_N
     )
 
     return final_retriever
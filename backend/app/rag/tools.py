@@ -8,10 +8,10 @@ Four tools that the LangGraph ReAct agent can call:
 4. summarize_topic        — structured topic summaries
 """
 
-import json
 import logging
 from typing import Optional
 
+import orjson
 from groq import Groq
 from langchain_core.tools import tool
 
@@ -25,6 +25,9 @@ logger = logging.getLogger(__name__)
 # per user. Read by chat.py after agent completes.
 _citation_cache: dict[str, list] = {}
 
+# Citations carry a pre-truncated snippet so readers never slice again.
+CITATION_SNIPPET_CHARS = 200
+
 
 def get_citations(user_id: str) -> list:
     """Get and clear cached citations for a user (called by chat.py)."""
@@ -48,36 +51,31 @@ def _make_search_course_materials(user_id: str, groq_api_key: str, course_id: Op
                 _citation_cache[user_id] = []
                 return "No relevant information found in course materials."
 
-            # Build formatted text for the LLM
-            # Use parent_content (richer context) if available, else chunk content
+            # One pass builds both the formatted text for the LLM and the
+            # structured citations (read by chat.py)
             blocks = []
+            citations = []
             for i, doc in enumerate(docs, 1):
                 meta = doc.metadata
                 source = meta.get("file_name", "unknown")
                 page = meta.get("page_number")
-                header = f"[{i}] (source: {source}"
-                if page is not None:
-                    header += f", page {page}"
-                header += ")"
+                page_part = f", page {page}" if page is not None else ""
                 # Parent content gives 800-char context vs 300-char child chunk
                 content = meta.get("parent_content", doc.page_content)
-                blocks.append(f"{header}\n{content}")
+                blocks.append(f"[{i}] (source: {source}{page_part})\n{content}")
 
-            # Store structured citations in cache (read by chat.py)
-            _citation_cache[user_id] = [
-                {
+                citations.append({
                     "id": i,
-                    "file_name": doc.metadata.get("file_name", "unknown"),
-                    "source_type": _detect_type(doc.metadata.get("file_name", "")),
-                    "page_number": doc.metadata.get("page_number"),
-                    "start_time": doc.metadata.get("start_time"),
-                    "end_time": doc.metadata.get("end_time"),
-                    "relevance_score": round(doc.metadata.get("relevance_score", 0.0), 3),
-                    "content": doc.page_content[:200],
-                }
-                for i, doc in enumerate(docs, 1)
-            ]
-
+                    "file_name": source,
+                    "source_type": _detect_type(source),
+                    "page_number": page,
+                    "start_time": meta.get("start_time"),
+                    "end_time": meta.get("end_time"),
+                    "relevance_score": round(meta.get("relevance_score", 0.0), 3),
+                    "text_snippet": doc.page_content[:CITATION_SNIPPET_CHARS],
+                })
+
+            _citation_cache[user_id] = citations
             return "\n\n".join(blocks)
         except Exception as e:
             logger.error(f"Course search failed: {e}")
@@ -178,7 +176,7 @@ def _make_generate_flashcards(user_id: str, groq_api_key: str, course_id: Option
             )
 
             raw = response.choices[0].message.content
-            cards = json.loads(raw)
+            cards = orjson.loads(raw)
             if isinstance(cards, dict) and "flashcards" in cards:
                 cards = cards["flashcards"]
 
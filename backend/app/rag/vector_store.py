@@ -12,18 +12,22 @@ Usage:
 """
 
 import logging
-from typing import Dict, List, Optional
+from itertools import count, islice
+from typing import Dict, Iterable, List, Optional
 
 from langchain_core.documents import Document
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_postgres import PGVector
-from sqlalchemy import text
+from sqlalchemy import TextClause, text
 
 from app.core.config import settings
 from app.core.sync_db import get_sync_engine
 
 logger = logging.getLogger(__name__)
 
+# Chunks embedded + inserted per round (bounds vector memory for big files)
+EMBED_BATCH_SIZE = 10_000
+
 # ── Embedding model singleton ─────────────────────────────────────────
 _embedding_model: Optional[HuggingFaceEmbeddings] = None
 
@@ -47,6 +51,42 @@ def get_embeddings() -> HuggingFaceEmbeddings:
     return _embedding_model
 
 
+# ── Collection generations ───────────────────────────────────────────
+# Caches derived from a collection's contents (the BM25 index in
+# retriever.py) key on its generation, bumped on every change.
+# add_documents / delete_by_file call invalidate_collection_caches;
+# the caches' TTLs bound staleness for writes made by other processes.
+_generations: Dict[str, int] = {}
+_generation_counter = count(1)
+
+
+def invalidate_collection_caches(user_id: str) -> None:
+    """Retire cached state for a user's collection after it changes."""
+    _generations[user_id] = next(_generation_counter)
+
+
+def collection_generation(user_id: str) -> int:
+    """Opaque version of a user's collection; changes on every write."""
+    return _generations.get(user_id, 0)
+
+
+def delete_by_file_stmt(user_id: str, file_id: str) -> TextClause:
+    """
+    DELETE for every chunk of one file in a user's collection.
+
+    Plain SQL against the langchain-postgres tables, so it can run on any
+    connection — including the request's async session, in the same
+    transaction as the File row update.
+    """
+    return text(
+        "DELETE FROM langchain_pg_embedding e "
+        "USING langchain_pg_collection c "
+        "WHERE e.collection_id = c.uuid "
+        "AND c.name = :collection "
+        "AND e.cmetadata->>'source_id' = :source_id"
+    ).bindparams(collection=f"user_{user_id}", source_id=file_id)
+
+
 class EduverseVectorStore:
     """
     Per-user vector store backed by PostgreSQL + pgvector.
@@ -66,32 +106,33 @@ class EduverseVectorStore:
             use_jsonb=True,
         )
 
-    def add_documents(self, documents: List[Document]) -> List[str]:
-        """Add documents to the vector store."""
-        if not documents:
-            return []
-        ids = self._store.add_documents(documents)
-        logger.info(f"Added {len(ids)} docs to '{self.collection_name}'")
+    def add_documents(
+        self, documents: Iterable[Document], batch_size: int = EMBED_BATCH_SIZE
+    ) -> List[str]:
+        """
+        Add documents to the vector store, batch_size at a time.
+
+        Accepts any iterable (e.g. SemanticMerger.iter_chunks), so only one
+        batch of texts and embedding vectors is in memory at once.
+        """
+        ids: List[str] = []
+        docs = iter(documents)
+        while batch := list(islice(docs, batch_size)):
+            ids.extend(self._store.add_documents(batch))
+        if ids:
+            invalidate_collection_caches(self.user_id)
+            logger.info(f"Added {len(ids)} docs to '{self.collection_name}'")
         return ids
 
     def delete_by_file(self, file_id: str) -> None:
         """Delete all chunks belonging to a specific file."""
         engine = get_sync_engine()
-        with engine.connect() as conn:
-            result = conn.execute(
-                text(
-                    "SELECT e.id FROM langchain_pg_embedding e "
-                    "JOIN langchain_pg_collection c ON e.collection_id = c.uuid "
-                    "WHERE c.name = :collection "
-                    "AND e.cmetadata->>'source_id' = :source_id"
-                ),
-                {"collection": self.collection_name, "source_id": file_id},
-            )
-            ids_to_delete = [str(row[0]) for row in result]
+        with engine.begin() as conn:
+            deleted = conn.execute(delete_by_file_stmt(self.user_id, file_id)).rowcount
 
-        if ids_to_delete:
-            self._store.delete(ids=ids_to_delete)
-            logger.info(f"Deleted {len(ids_to_delete)} docs for source_id='{file_id}'")
+        if deleted:
+            invalidate_collection_caches(self.user_id)
+            logger.info(f"Deleted {deleted} docs for source_id='{file_id}'")
 
     def get_retriever(self, **kwargs):
         """Get a LangChain retriever for this user's collection."""
@@ -134,26 +175,21 @@ class EduverseVectorStore:
 
         Returns Document objects with page_content and metadata.
         Limited to `limit` docs to prevent memory issues.
+        Database errors propagate, so an empty list always means an
+        empty collection.
         """
         engine = get_sync_engine()
-        try:
-            with engine.connect() as conn:
-                result = conn.execute(
-                    text(
-                        "SELECT e.document, e.cmetadata FROM langchain_pg_embedding e "
-                        "JOIN langchain_pg_collection c ON e.collection_id = c.uuid "
-                        "WHERE c.name = :name "
-                        "LIMIT :limit"
-                    ),
-                    {"name": self.collection_name, "limit": limit},
-                )
-                docs = []
-                for row in result:
-                    docs.append(Document(
-                        page_content=row[0] or "",
-                        metadata=row[1] or {},
-                    ))
-                return docs
-        except Exception as e:
-            logger.warning(f"Could not load documents for BM25: {e}")
-            return []
\ No newline at end of file
+        with engine.connect() as conn:
+            result = conn.execute(
+                text(
+                    "SELECT e.document, e.cmetadata FROM langchain_pg_embedding e "
+                    "JOIN langchain_pg_collection c ON e.collection_id = c.uuid "
+                    "WHERE c.name = :name "
+                    "LIMIT :limit"
+                ),
+                {"name": self.collection_name, "limit": limit},
+            )
+            return [
+                Document(page_content=row[0] or "", metadata=row[1] or {})
+                for row in result
+            ]
\ No newline at end of file
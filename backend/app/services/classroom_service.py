@@ -1,33 +1,79 @@
-import asyncio
 from typing import List, Optional
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+
 import backoff
+import httpx
+from google.oauth2.credentials import Credentials
+
+from app.core.exceptions import ClassroomAPIError
+from app.core.http_client import get_http_client
+from app.services.google_auth import authorization_header
+from app.services.service_cache import ServiceCache
+
+CLASSROOM_API = "https://classroom.googleapis.com/v1"
+
+
+# ── Per-token service cache ──────────────────────────────────────────
+_service_cache = ServiceCache()
 
-from app.core.exceptions import ClassroomAPIError, DriveAPIError
+
+def get_classroom_service(credentials: Credentials) -> "ClassroomService":
+    """Return a ClassroomService for these credentials, reusing a cached one."""
+    return _service_cache.get(credentials, ClassroomService)
+
+
+def _is_permanent(e: Exception) -> bool:
+    """Client errors won't succeed on retry (429 is the exception)."""
+    return (
+        isinstance(e, httpx.HTTPStatusError)
+        and 400 <= e.response.status_code < 500
+        and e.response.status_code != 429
+    )
 
 
 class ClassroomService:
     """Enhanced service for Google Classroom API with async support."""
     
-    def __init__(self, credentials: Credentials):
+    def __init__(self, credentials: Credentials, client: Optional[httpx.AsyncClient] = None):
         """
         Initialize service with Google credentials.
         
         Args:
             credentials: Valid Google Credentials object
+            client: HTTP client to use (defaults to the shared app client,
+                so connections are reused across requests)
         """
         self.credentials = credentials
-        self.classroom_service = build('classroom', 'v1', credentials=credentials)
-        self.drive_service = build('drive', 'v3', credentials=credentials)
+        self.client = client or get_http_client()
     
     @backoff.on_exception(
         backoff.expo,
-        HttpError,
+        (httpx.HTTPStatusError, httpx.TransportError),
         max_tries=3,
-        giveup=lambda e: e.resp.status in [400, 401, 403, 404]
+        giveup=_is_permanent,
     )
+    async def _get(self, path: str, params: Optional[dict] = None) -> dict:
+        """GET a Classroom REST resource (retries 5xx/429/transport errors)."""
+        response = await self.client.get(
+            f"{CLASSROOM_API}/{path}",
+            params=params,
+            headers=await authorization_header(self.credentials),
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    async def _list_all(self, path: str, key: str, page_size: int) -> List[dict]:
+        """Follow nextPageToken until every item of `key` is collected."""
+        items = []
+        params = {"pageSize": page_size}
+        
+        while True:
+            result = await self._get(path, params)
+            items.extend(result.get(key, []))
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                return items
+            params = {"pageSize": page_size, "pageToken": page_token}
+    
     async def list_courses(self, page_size: int = 50) -> List[dict]:
         """
         List all courses for the user with pagination.
@@ -36,117 +82,40 @@ class ClassroomService:
             List of course dictionaries
         """
         try:
-            courses = []
-            page_token = None
-            
-            while True:
-                result = await asyncio.to_thread(
-                    lambda pt=page_token: self.classroom_service.courses().list(
-                        pageSize=page_size,
-                        pageToken=pt
-                    ).execute()
-                )
-                
-                courses.extend(result.get('courses', []))
-                page_token = result.get('nextPageToken')
-                
-                if not page_token:
-                    break
-            
-            return courses
-        
-        except HttpError as e:
+            return await self._list_all("courses", "courses", page_size)
+        except httpx.HTTPError as e:
             raise ClassroomAPIError(f"Failed to list courses: {str(e)}")
     
-    @backoff.on_exception(backoff.expo, HttpError, max_tries=3)
     async def get_course(self, course_id: str) -> dict:
         """Get detailed course information."""
         try:
-            return await asyncio.to_thread(
-                lambda: self.classroom_service.courses().get(id=course_id).execute()
-            )
-        except HttpError as e:
+            return await self._get(f"courses/{course_id}")
+        except httpx.HTTPError as e:
             raise ClassroomAPIError(f"Failed to get course {course_id}: {str(e)}")
     
-    @backoff.on_exception(backoff.expo, HttpError, max_tries=3)
     async def list_coursework(self, course_id: str, page_size: int = 50) -> List[dict]:
         """List all coursework (assignments) for a course."""
         try:
-            coursework = []
-            page_token = None
-            
-            while True:
-                result = await asyncio.to_thread(
-                    lambda pt=page_token: self.classroom_service.courses().courseWork().list(
-                        courseId=course_id,
-                        pageSize=page_size,
-                        pageToken=pt
-                    ).execute()
-                )
-                
-                coursework.extend(result.get('courseWork', []))
-                page_token = result.get('nextPageToken')
-                
-                if not page_token:
-                    break
-            
-            return coursework
-        
-        except HttpError as e:
+            return await self._list_all(f"courses/{course_id}/courseWork", "courseWork", page_size)
+        except httpx.HTTPError as e:
             raise ClassroomAPIError(f"Failed to list coursework for {course_id}: {str(e)}")
     
-    @backoff.on_exception(backoff.expo, HttpError, max_tries=3)
     async def list_coursework_materials(self, course_id: str, page_size: int = 50) -> List[dict]:
         """List all coursework materials for a course."""
         try:
-            materials = []
-            page_token = None
-            
-            while True:
-                result = await asyncio.to_thread(
-                    lambda pt=page_token: self.classroom_service.courses().courseWorkMaterials().list(
-                        courseId=course_id,
-                        pageSize=page_size,
-                        pageToken=pt
-                    ).execute()
-                )
-                
-                materials.extend(result.get('courseWorkMaterial', []))
-                page_token = result.get('nextPageToken')
-                
-                if not page_token:
-                    break
-            
-            return materials
-        
-        except HttpError as e:
+            return await self._list_all(
+                f"courses/{course_id}/courseWorkMaterials", "courseWorkMaterial", page_size
+            )
+        except httpx.HTTPError as e:
             raise ClassroomAPIError(f"Failed to list materials for {course_id}: {str(e)}")
     
-    @backoff.on_exception(backoff.expo, HttpError, max_tries=3)
     async def list_announcements(self, course_id: str, page_size: int = 50) -> List[dict]:
         """List all announcements for a course (often contain lecture PDFs)."""
         try:
-            announcements = []
-            page_token = None
-            
-            while True:
-                result = await asyncio.to_thread(
-                    lambda pt=page_token: self.classroom_service.courses().announcements().list(
-                        courseId=course_id,
-                        pageSize=page_size,
-                        pageToken=pt
-                    ).execute()
-                )
-                
-                announcements.extend(result.get('announcements', []))
-                page_token = result.get('nextPageToken')
-                
-                if not page_token:
-                    break
-            
-            return announcements
-        
-        except HttpError as e:
+            return await self._list_all(
+                f"courses/{course_id}/announcements", "announcements", page_size
+            )
+        except httpx.HTTPError as e:
             raise ClassroomAPIError(f"Failed to list announcements for {course_id}: {str(e)}")
     
     async def extract_drive_files(self, coursework_or_material: dict) -> List[dict]:
@@ -238,7 +207,7 @@ class ClassroomService:
                     if file['drive_id'] not in seen_ids:
                         all_files.append(file)
                         seen_ids.add(file['drive_id'])
-        except (ClassroomAPIError, HttpError) as e:
+        except ClassroomAPIError as e:
             import logging
             logging.getLogger(__name__).warning(
                 f"Could not fetch announcements for {course_id} "
@@ -1,30 +1,61 @@
 import asyncio
 import os
 import hashlib
-import io
 import uuid
 from pathlib import Path
 from typing import Optional
 
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload
+import httpx
 from google.oauth2.credentials import Credentials
 
 from app.core.config import settings
 from app.core.exceptions import DriveAPIError, ProcessingError
+from app.core.http_client import get_http_client
+from app.services.google_auth import authorization_header
+from app.services.service_cache import ServiceCache
+
+DRIVE_FILES_API = "https://www.googleapis.com/drive/v3/files"
+DOWNLOAD_CHUNK = 1024 * 1024
+# Large lecture videos: no overall deadline, but don't hang on a stalled read
+DOWNLOAD_TIMEOUT = httpx.Timeout(None, connect=10.0, read=120.0)
+
+
+def new_file_hasher():
+    """Hash object for file contents, per settings.FILE_HASH_ALGORITHM."""
+    if settings.FILE_HASH_ALGORITHM == "sha256":
+        return hashlib.sha256()
+    return hashlib.blake2b(digest_size=32)
+
+
+def _write_and_hash(f, hasher, chunk: bytes) -> None:
+    """Write a chunk and fold it into the hash (one thread hop; hashlib drops the GIL)."""
+    f.write(chunk)
+    hasher.update(chunk)
+
+
+# ── Per-token service cache ──────────────────────────────────────────
+_service_cache = ServiceCache()
+
+
+def get_file_service(credentials: Credentials) -> "FileService":
+    """Return a FileService for these credentials, reusing a cached one."""
+    return _service_cache.get(credentials, FileService)
 
 
 class FileService:
     """Service for managing file downloads from Google Drive."""
     
-    def __init__(self, credentials: Credentials):
+    def __init__(self, credentials: Credentials, client: Optional[httpx.AsyncClient] = None):
         """
         Initialize service with Google credentials.
         
         Args:
             credentials: Valid Google Credentials object
+            client: HTTP client to use (defaults to the shared app client,
+                so concurrent downloads share its connection pool)
         """
-        self.drive_service = build('drive', 'v3', credentials=credentials)
+        self.credentials = credentials
+        self.client = client or get_http_client()
         self.storage_dir = Path(settings.UPLOAD_DIR)
         self.storage_dir.mkdir(parents=True, exist_ok=True)
     
@@ -37,55 +68,46 @@ class FileService:
         """
         Download a file from Google Drive.
         
+        Streams the body to disk in chunks, hashing as it goes — the file
+        is never held in memory and never re-read for the hash.
+        
         Args:
             file_id: Google Drive file ID
             file_name: Original file name
             user_id: User ID (for organizing storage)
         
         Returns:
-            (local_path, file_size_bytes, file_hash_sha256)
+            (local_path, file_size_bytes, file_hash_hex)
         """
-        try:
-            # All Google Drive API calls are synchronous — run in a thread
-            # to avoid blocking the asyncio event loop during downloads.
-            return await asyncio.to_thread(
-                self._download_file_sync, file_id, file_name, user_id
-            )
-        except DriveAPIError:
-            raise
-        except Exception as e:
-            raise DriveAPIError(f"Failed to download file {file_id}: {str(e)}")
-
-    def _download_file_sync(
-        self, file_id: str, file_name: str, user_id: str
-    ) -> tuple:
-        """Synchronous download — called via asyncio.to_thread()."""
         user_dir = self.storage_dir / user_id
         user_dir.mkdir(parents=True, exist_ok=True)
 
         unique_filename = f"{uuid.uuid4()}_{file_name}"
         local_path = user_dir / unique_filename
 
-        # Download file content directly — skip metadata pre-check
-        # (metadata is already known from Classroom API, and the
-        #  files().get() call fails for teacher-owned announcement files)
-        request = self.drive_service.files().get_media(
-            fileId=file_id, supportsAllDrives=True
-        )
-        fh = io.BytesIO()
-        downloader = MediaIoBaseDownload(fh, request)
-
-        done = False
-        while not done:
-            status, done = downloader.next_chunk()
-
-        with open(local_path, 'wb') as f:
-            f.write(fh.getvalue())
-
-        file_hash = self._calculate_hash(local_path)
-        file_size = local_path.stat().st_size
+        hasher = new_file_hasher()
+        file_size = 0
+        try:
+            # Download file content directly — skip metadata pre-check
+            # (metadata is already known from Classroom API, and the
+            #  files.get metadata call fails for teacher-owned announcement files)
+            async with self.client.stream(
+                "GET",
+                f"{DRIVE_FILES_API}/{file_id}",
+                params={"alt": "media", "supportsAllDrives": "true"},
+                headers=await authorization_header(self.credentials),
+                timeout=DOWNLOAD_TIMEOUT,
+            ) as response:
+                response.raise_for_status()
+                with open(local_path, 'wb') as f:
+                    async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK):
+                        await asyncio.to_thread(_write_and_hash, f, hasher, chunk)
+                        file_size += len(chunk)
+        except Exception as e:
+            local_path.unlink(missing_ok=True)
+            raise DriveAPIError(f"Failed to download file {file_id}: {str(e)}")
 
-        return str(local_path), file_size, file_hash
+        return str(local_path), file_size, hasher.hexdigest()
     
     async def get_file_metadata(self, file_id: str) -> dict:
         """
@@ -101,21 +123,19 @@ class FileService:
             }
         """
         try:
-            return self.drive_service.files().get(
-                fileId=file_id,
-                fields="id,name,mimeType,size,webViewLink,createdTime,modifiedTime"
-            ).execute()
+            response = await self.client.get(
+                f"{DRIVE_FILES_API}/{file_id}",
+                params={
+                    "fields": "id,name,mimeType,size,webViewLink,createdTime,modifiedTime",
+                    "supportsAllDrives": "true",
+                },
+                headers=await authorization_header(self.credentials),
+            )
+            response.raise_for_status()
+            return response.json()
         except Exception as e:
             raise DriveAPIError(f"Failed to get metadata for {file_id}: {str(e)}")
     
-    def _calculate_hash(self, file_path: Path) -> str:
-        """Calculate SHA-256 hash of a file."""
-        sha256_hash = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        return sha256_hash.hexdigest()
-    
     def detect_file_type(self, mime_type: str, file_name: str) -> str:
         """
         Detect normalized file type from MIME type and filename.
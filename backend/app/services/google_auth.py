@@ -1,3 +1,5 @@
+import asyncio
+import logging
 import os
 import uuid
 from datetime import datetime, timedelta, timezone
@@ -7,17 +9,103 @@ from typing import Optional
 # (e.g. when user previously granted additional scopes)
 os.environ['OAUTHLIB_RELAX_TOKEN_SCOPE'] = '1'
 
+from cachetools import TTLCache
 from google_auth_oauthlib.flow import Flow
+from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 
 from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.http_client import get_http_client
 from app.core.security import encrypt_token, decrypt_token
 from app.core.exceptions import GoogleAuthError, ResourceNotFoundError
 from app.models.database import User
 
+logger = logging.getLogger(__name__)
+
+
+# ── Warm credentials + proactive refresh ─────────────────────────────
+# Credentials handed out by get_valid_credentials are kept per user; a
+# background loop refreshes them shortly before expiry so request paths
+# never pay the OAuth round trip. Entries idle for an hour are dropped.
+CREDENTIALS_IDLE_TTL = 3600  # seconds
+REFRESH_INTERVAL = 60  # seconds
+REFRESH_AHEAD = timedelta(minutes=5)
+
+_credentials_cache: TTLCache = TTLCache(maxsize=10_000, ttl=CREDENTIALS_IDLE_TTL)
+_refresh_task: Optional[asyncio.Task] = None
+
+
+def _utcnow_naive() -> datetime:
+    # google-auth compares expiry against naive UTC datetimes
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+async def authorization_header(credentials: Credentials) -> dict:
+    """Bearer header for a Google REST call, refreshing an expired token first."""
+    if not credentials.valid and credentials.refresh_token:
+        await asyncio.to_thread(credentials.refresh, Request())
+    return {"Authorization": f"Bearer {credentials.token}"}
+
+
+async def _persist_refreshed(user_id: str, creds: Credentials) -> None:
+    """Write a refreshed access token back so other workers see it."""
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(
+                encrypted_access_token=encrypt_token(creds.token),
+                token_expiry=creds.expiry,
+            )
+        )
+        await db.commit()
+
+
+async def _refresh_expiring_credentials() -> None:
+    """Refresh every cached credential that expires within REFRESH_AHEAD."""
+    cutoff = _utcnow_naive() + REFRESH_AHEAD
+    for user_id, creds in list(_credentials_cache.items()):
+        if not creds.refresh_token or creds.expiry is None or creds.expiry > cutoff:
+            continue
+        try:
+            # google-auth is synchronous — keep the refresh off the loop
+            await asyncio.to_thread(creds.refresh, Request())
+            await _persist_refreshed(user_id, creds)
+        except Exception as e:
+            logger.warning("Proactive token refresh failed for user %s: %s", user_id, e)
+            _credentials_cache.pop(user_id, None)
+
+
+async def _refresh_loop() -> None:
+    while True:
+        await asyncio.sleep(REFRESH_INTERVAL)
+        try:
+            await _refresh_expiring_credentials()
+        except Exception:
+            logger.exception("Credential refresh sweep failed")
+
+
+def start_credentials_refresher() -> None:
+    """Start the background refresh loop (call from the app lifespan)."""
+    global _refresh_task
+    if _refresh_task is None:
+        _refresh_task = asyncio.create_task(_refresh_loop())
+
+
+async def stop_credentials_refresher() -> None:
+    """Cancel the background refresh loop on shutdown."""
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
+
 
 class GoogleAuthService:
     """Service for Google OAuth authentication with database integration."""
@@ -33,13 +121,16 @@ class GoogleAuthService:
         "openid"
     ]
 
+    TOKEN_URI = "https://oauth2.googleapis.com/token"
+    USERINFO_URI = "https://www.googleapis.com/oauth2/v2/userinfo"
+
     def __init__(self):
         self.client_config = {
             "web": {
                 "client_id": settings.GOOGLE_CLIENT_ID,
                 "project_id": "eduverse",  
                 "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                "token_uri": "https://oauth2.googleapis.com/token",
+                "token_uri": self.TOKEN_URI,
                 "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
                 "client_secret": settings.GOOGLE_CLIENT_SECRET,
                 "redirect_uris": [settings.GOOGLE_REDIRECT_URI],
@@ -80,22 +171,36 @@ class GoogleAuthService:
             }
         """
         try:
-            flow = Flow.from_client_config(
-                self.client_config,
-                scopes=self.SCOPES,
-                redirect_uri=settings.GOOGLE_REDIRECT_URI
+            client = get_http_client()
+            response = await client.post(
+                self.TOKEN_URI,
+                data={
+                    "code": code,
+                    "client_id": settings.GOOGLE_CLIENT_ID,
+                    "client_secret": settings.GOOGLE_CLIENT_SECRET,
+                    "redirect_uri": settings.GOOGLE_REDIRECT_URI,
+                    "grant_type": "authorization_code",
+                },
             )
-            flow.fetch_token(code=code)
-            credentials = flow.credentials
+            response.raise_for_status()
+            payload = response.json()
+            
+            expiry = None
+            if payload.get("expires_in"):
+                # google-auth compares expiry against naive UTC datetimes
+                expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(
+                    seconds=int(payload["expires_in"])
+                )
+            scopes = payload["scope"].split() if payload.get("scope") else self.SCOPES
             
             return {
-                "token": credentials.token,
-                "refresh_token": credentials.refresh_token,
-                "token_uri": credentials.token_uri,
-                "client_id": credentials.client_id,
-                "client_secret": credentials.client_secret,
-                "scopes": credentials.scopes,
-                "expiry": credentials.expiry
+                "token": payload["access_token"],
+                "refresh_token": payload.get("refresh_token"),
+                "token_uri": self.TOKEN_URI,
+                "client_id": settings.GOOGLE_CLIENT_ID,
+                "client_secret": settings.GOOGLE_CLIENT_SECRET,
+                "scopes": scopes,
+                "expiry": expiry
             }
         except Exception as e:
             raise GoogleAuthError(f"Failed to exchange code: {str(e)}")
@@ -113,18 +218,13 @@ class GoogleAuthService:
             }
         """
         try:
-            creds = Credentials(
-                token=token_info["token"],
-                refresh_token=token_info.get("refresh_token"),
-                token_uri=token_info["token_uri"],
-                client_id=token_info["client_id"],
-                client_secret=token_info["client_secret"],
-                scopes=token_info["scopes"]
+            client = get_http_client()
+            response = await client.get(
+                self.USERINFO_URI,
+                headers={"Authorization": f"Bearer {token_info['token']}"},
             )
-            
-            service = build('oauth2', 'v2', credentials=creds)
-            user_info = service.userinfo().get().execute()
-            return user_info
+            response.raise_for_status()
+            return response.json()
         except Exception as e:
             raise GoogleAuthError(f"Failed to get user info: {str(e)}")
 
@@ -176,6 +276,9 @@ class GoogleAuthService:
             )
             db.add(user)
         
+        # Fresh tokens from login supersede any warm credentials
+        _credentials_cache.pop(user.id, None)
+        
         # Don't commit here — let the caller's get_db() dependency handle it
         await db.flush()
         await db.refresh(user)
@@ -189,6 +292,9 @@ class GoogleAuthService:
         """
         Get valid Google credentials for a user, refreshing if needed.
         
+        Served from the warm cache when possible; the background loop keeps
+        cached credentials refreshed ahead of expiry.
+        
         Args:
             db: Database session
             user_id: User ID
@@ -196,6 +302,11 @@ class GoogleAuthService:
         Returns:
             Valid Google Credentials object
         """
+        creds = _credentials_cache.get(user_id)
+        if creds is not None and creds.valid:
+            _credentials_cache[user_id] = creds  # keep warm while in use
+            return creds
+        
         result = await db.execute(select(User).where(User.id == user_id))
         user = result.scalar_one_or_none()
         
@@ -208,16 +319,16 @@ class GoogleAuthService:
         creds = Credentials(
             token=access_token,
             refresh_token=refresh_token,
-            token_uri="https://oauth2.googleapis.com/token",
+            token_uri=self.TOKEN_URI,
             client_id=settings.GOOGLE_CLIENT_ID,
             client_secret=settings.GOOGLE_CLIENT_SECRET,
-            scopes=self.SCOPES
+            scopes=self.SCOPES,
+            expiry=user.token_expiry,
         )
         
         if creds.expired and creds.refresh_token:
             try:
-                from google.auth.transport.requests import Request
-                creds.refresh(Request())
+                await asyncio.to_thread(creds.refresh, Request())
                 
                 user.encrypted_access_token = encrypt_token(creds.token)
                 if creds.expiry:
@@ -228,4 +339,9 @@ class GoogleAuthService:
             except Exception as e:
                 raise GoogleAuthError(f"Failed to refresh token: {str(e)}")
         
-        return creds
\ No newline at end of file
+        _credentials_cache[user_id] = creds
+        return creds
+
+
+# Shared instance — the client config is static, so one serves every route.
+auth_service = GoogleAuthService()
@@ -0,0 +1,43 @@
+"""
+Per-token cache for Google API service wrappers.
+
+Wrappers bound to the same access token are reused until that token
+expires (capped at MAX_SERVICE_TTL), so a rotated token gets a new one.
+"""
+
+import threading
+from datetime import datetime, timezone
+from typing import Callable, TypeVar
+
+from cachetools import TLRUCache
+from google.oauth2.credentials import Credentials
+
+MAX_SERVICE_TTL = 3600  # seconds
+
+T = TypeVar("T")
+
+
+def _credentials_ttu(_token, service, now: float) -> float:
+    """Expire a cached service when its access token expires."""
+    expiry = service.credentials.expiry
+    if expiry is None:
+        return now + MAX_SERVICE_TTL
+    remaining = (expiry - datetime.now(timezone.utc).replace(tzinfo=None)).total_seconds()
+    return now + max(0.0, min(remaining, MAX_SERVICE_TTL))
+
+
+class ServiceCache:
+    """Thread-safe TLRU cache of services keyed by access token."""
+
+    def __init__(self, maxsize: int = 512):
+        self._cache: TLRUCache = TLRUCache(maxsize=maxsize, ttu=_credentials_ttu)
+        self._lock = threading.Lock()
+
+    def get(self, credentials: Credentials, factory: Callable[[Credentials], T]) -> T:
+        """Return the cached service for these credentials, building it on a miss."""
+        with self._lock:
+            service = self._cache.get(credentials.token)
+            if service is None:
+                service = factory(credentials)
+                self._cache[credentials.token] = service
+        return service
@@ -23,15 +23,16 @@ from sqlalchemy import select, update
 
 from app.core.config import settings
 from app.core.database import AsyncSessionLocal
+from app.core.process_pool import run_in_process
 from app.core.security import decrypt_token
 from app.models.database import File, User
 from app.processing.audio_processor import process_audio
 from app.processing.image_processor import process_image
-from app.processing.pdf_processor import process_pdf
-from app.processing.semantic_merger import SemanticMerger
+from app.processing.pdf_processor import process_pdf_file
+from app.processing.semantic_merger import merge_and_chunk
 from app.processing.video_processor import process_video
 from app.rag.vector_store import EduverseVectorStore
-from app.services.file_service import FileService
+from app.services.file_service import get_file_service
 from app.workflows.states import IndexingState
 
 logger = logging.getLogger(__name__)
@@ -102,7 +103,7 @@ async def download_node(state: IndexingState) -> Dict[str, Any]:
         client_secret=settings.GOOGLE_CLIENT_SECRET,
     )
 
-    file_service = FileService(credentials=creds)
+    file_service = get_file_service(creds)
     local_path, file_size, file_hash = await file_service.download_file(
         file_id=drive_id,
         file_name=file_name,
@@ -138,7 +139,7 @@ async def process_node(state: IndexingState) -> Dict[str, Any]:
     Route to the correct processor based on file type.
 
     Uses the existing Phase 4 processors:
-      - PDF  → pdf_processor.process_pdf()
+      - PDF  → pdf_processor.process_pdf_file()
       - Video → video_processor.process_video()
       - Audio → audio_processor.process_audio()
       - Image → image_processor.process_image()
@@ -157,14 +158,13 @@ async def process_node(state: IndexingState) -> Dict[str, Any]:
 
     try:
         if file_type == "pdf":
-            with open(file_path, "rb") as f:
-                content = f.read()
-            documents = await process_pdf(
-                file_content=content,
+            documents = await process_pdf_file(
+                file_path=file_path,
                 groq_api_key=groq_api_key,
                 file_name=file_name,
                 course_id=course_id,
                 source_id=source_id,
+                raise_errors=True,
             )
         elif file_type == "video":
             documents = await process_video(
@@ -235,8 +235,10 @@ async def chunk_node(state: IndexingState) -> Dict[str, Any]:
     """
     Split documents into 500-char chunks using SemanticMerger.
 
-    Uses LangChain's RecursiveCharacterTextSplitter under the hood,
-    and normalizes metadata to the fixed vector schema.
+    Uses semantic-text-splitter (Rust) under the hood, folds tiny
+    fragments into their neighbours, drops near-duplicate chunks with
+    MinHash-LSH, and normalizes metadata to the fixed vector schema.
+    Runs in the process pool.
     """
     documents = state.get("documents", [])
     if not documents:
@@ -245,11 +247,13 @@ async def chunk_node(state: IndexingState) -> Dict[str, Any]:
     course_id = state.get("course_id")
     course_name = state.get("course_name")
 
-    merger = SemanticMerger(chunk_size=500, chunk_overlap=100)
-    chunks = merger.merge_and_chunk(
+    chunks = await run_in_process(
+        merge_and_chunk,
         documents=documents,
         course_id=course_id,
         course_name=course_name,
+        chunk_size=500,
+        chunk_overlap=100,
     )
 
     if not chunks:
@@ -0,0 +1,115 @@
+"""
+arq worker for the indexing pipeline.
+
+Run alongside the API (needs REDIS_URL):
+    arq app.workflows.worker.WorkerSettings
+
+Job names match the function names, e.g.
+    await pool.enqueue_job("run_indexing", file_id=..., user_id=..., ...)
+
+The user's Groq key travels Fernet-encrypted (encrypted_groq_key) and is
+only decrypted inside the task, so job payloads and stored results in
+Redis never hold it in plaintext.
+"""
+
+import logging
+from typing import List
+
+from sqlalchemy import update
+
+from app.core.database import AsyncSessionLocal, close_db
+from app.core.http_client import close_http_client
+from app.core.logging_config import setup_logging, stop_logging
+from app.core.process_pool import shutdown_process_pool
+from app.core.security import decrypt_token
+from app.core.task_queue import redis_settings
+from app.models.database import File
+from app.workflows import indexing_workflow
+
+logger = logging.getLogger(__name__)
+
+
+async def run_indexing(
+    ctx: dict,
+    file_id: str,
+    user_id: str,
+    encrypted_groq_key: str,
+    course_id: str = None,
+    course_name: str = None,
+) -> dict:
+    """
+    arq task: run the indexing workflow for a single file.
+
+    Returns a status summary rather than the final workflow state, which
+    carries the decrypted key and every chunk — arq keeps the result.
+    """
+    result = await indexing_workflow.run_indexing(
+        file_id=file_id,
+        user_id=user_id,
+        groq_api_key=decrypt_token(encrypted_groq_key),
+        course_id=course_id,
+        course_name=course_name,
+    )
+    return {
+        "status": result.get("status"),
+        "chunk_count": result.get("chunk_count", 0),
+        "error": result.get("error"),
+    }
+
+
+async def index_course(
+    ctx: dict,
+    file_ids: List[str],
+    user_id: str,
+    encrypted_groq_key: str,
+    course_id: str,
+    course_name: str = None,
+) -> int:
+    """
+    arq task: fan a course out into one run_indexing job per file.
+
+    Per-file jobs spread across every worker instead of running
+    serially inside this one.
+    """
+    job_ids = []
+    for file_id in file_ids:
+        job = await ctx["redis"].enqueue_job(
+            "run_indexing",
+            file_id=file_id,
+            user_id=user_id,
+            encrypted_groq_key=encrypted_groq_key,
+            course_id=course_id,
+            course_name=course_name,
+        )
+        if job is not None:
+            job_ids.append({"id": file_id, "processing_job_id": job.job_id})
+
+    # Bulk UPDATE by primary key — one executemany for all files
+    if job_ids:
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(File), job_ids)
+            await db.commit()
+
+    logger.info("Queued %d files for course %s", len(job_ids), course_id)
+    return len(job_ids)
+
+
+async def _startup(ctx: dict) -> None:
+    setup_logging(logging.INFO)
+
+
+async def _shutdown(ctx: dict) -> None:
+    await close_db()
+    await close_http_client()
+    shutdown_process_pool()
+    stop_logging()
+
+
+class WorkerSettings:
+    functions = [run_indexing, index_course]
+    on_startup = _startup
+    on_shutdown = _shutdown
+    redis_settings = redis_settings()
+    max_jobs = 4
+    job_timeout = 30 * 60  # seconds — long videos go through Whisper
+    keep_result = 3600
@@ -0,0 +1,71 @@
+"""
+SemanticMerger's low-information filter must never drop chunks it
+can't judge: formula-only, code-only and numeric chunks have no word
+terms to compare.
+"""
+
+from collections import deque
+
+import pytest
+from langchain_core.documents import Document
+
+from app.processing.semantic_merger import (
+    REDUNDANCY_ALPHA,
+    REDUNDANCY_THRESHOLD,
+    SemanticMerger,
+    _information_score,
+    _terms,
+)
+
+PROSE = (
+    "Gradient descent updates parameters along the negative gradient "
+    "of the loss function with a fixed learning rate"
+)
+FORMULA = "x = (-b ± √(b² - 4·a·c)) / 2a"
+CODE = "i += 1; x[i] = f(x[i-1])"
+NUMBERS = "1 2 3\n4 5 6\n7 8 9"
+
+
+class _ParagraphSplitter:
+    """Deterministic stand-in for TextSplitter: one chunk per paragraph."""
+
+    def chunks(self, text):
+        return text.split("\n\n")
+
+
+def _merger(**kwargs) -> SemanticMerger:
+    merger = SemanticMerger(dedupe_threshold=None, **kwargs)
+    merger.splitter = _ParagraphSplitter()
+    merger.merge_tiny = False
+    return merger
+
+
+def _chunk_texts(merger: SemanticMerger, *paragraphs: str) -> list:
+    doc = Document(
+        page_content="\n\n".join(paragraphs),
+        metadata={"file_name": "notes.pdf", "page_number": 1},
+    )
+    prefix = "[From notes.pdf, page 1] "
+    return [chunk.page_content.removeprefix(prefix) for chunk in merger.iter_chunks([doc])]
+
+
+@pytest.mark.parametrize("text", [FORMULA, CODE, NUMBERS])
+def test_termless_chunk_scores_as_novel(text):
+    window = deque([_terms(PROSE)])
+    assert _information_score(_terms(text), window, REDUNDANCY_ALPHA) == 1.0
+
+
+def test_filter_is_off_by_default():
+    assert SemanticMerger().redundancy_threshold is None
+    assert _chunk_texts(_merger(), PROSE, PROSE, FORMULA) == [PROSE, PROSE, FORMULA]
+
+
+@pytest.mark.parametrize("text", [FORMULA, CODE, NUMBERS])
+def test_opt_in_filter_keeps_formula_and_code_chunks(text):
+    merger = _merger(redundancy_threshold=REDUNDANCY_THRESHOLD)
+    assert _chunk_texts(merger, PROSE, text, text) == [PROSE, text, text]
+
+
+def test_opt_in_filter_still_drops_repeated_prose():
+    merger = _merger(redundancy_threshold=REDUNDANCY_THRESHOLD)
+    assert _chunk_texts(merger, PROSE, PROSE) == [PROSE]